@@ -0,0 +1,203 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from os import path
+from typing import Any, Callable, Optional
+import argparse
+import gc
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+
+import day14.day14 as day14
+import day15.day15 as day15
+import day16.day16 as day16
+import day17.day17 as day17
+import day18.day18 as day18
+import day19.day19 as day19
+import day20.day20 as day20
+import day21.day21 as day21
+import day22.day22 as day22
+import day23.day23 as day23
+import day24.day24 as day24
+import day25.day25 as day25
+
+@dataclass(frozen = True)
+class BenchCase:
+    name: str
+    setup: Callable[[bool], tuple] # untimed, runs before every sample and returns the arguments of `fn`, given whether to use the puzzle input
+    fn: Callable[..., Any]
+    slow: bool = False # only run when explicitly selected or with --all
+
+@dataclass
+class BenchResult:
+    name: str
+    samples_ns: list[int]
+
+    @property
+    def stats(self) -> dict[str, float]:
+        return {
+            'min_ns': min(self.samples_ns),
+            'median_ns': statistics.median(self.samples_ns),
+            'p95_ns': percentile(self.samples_ns, 95),
+            'mean_ns': statistics.fmean(self.samples_ns),
+            'stdev_ns': statistics.stdev(self.samples_ns) if len(self.samples_ns) > 1 else 0.0,
+        }
+
+def percentile(samples: list[int], pct: float) -> float:
+    # nearest-rank percentile, so that it is always one of the measured samples
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+def input_path(day: int, input_file: str) -> str:
+    return path.join(path.dirname(__file__), f'day{day:02}', input_file)
+
+def pick_input(day: int, example_file: str, use_input: bool) -> str:
+    # the puzzle inputs aren't committed, so fall back to the example when there's none
+    if use_input and path.isfile(input_path(day, 'input.txt')):
+        return input_path(day, 'input.txt')
+    else:
+        return input_path(day, example_file)
+
+def with_file(day: int, example_file: str, parse_fn: Callable[[str], Any]) -> Callable[[bool], tuple]:
+    return lambda use_input: (parse_fn(pick_input(day, example_file, use_input)),)
+
+CASES = [
+    BenchCase('day14.part1', with_file(14, 'example.txt', day14.parse_instructions), day14.part1),
+    BenchCase('day14.part2', with_file(14, 'example2.txt', day14.parse_instructions), day14.part2),
+    BenchCase('day15.part1', lambda use_input: ([1, 0, 16, 5, 17, 4] if use_input else [0, 3, 6],), day15.part1),
+    BenchCase('day15.part2', lambda use_input: ([1, 0, 16, 5, 17, 4] if use_input else [0, 3, 6],), day15.part2, slow = True),
+    BenchCase('day16.part1', with_file(16, 'example.txt', day16.parse_notes), day16.part1),
+    BenchCase('day16.part2', with_file(16, 'example.txt', day16.parse_notes), day16.part2),
+    BenchCase('day17.part1', with_file(17, 'example.txt', day17.parse_initial_state), day17.part1),
+    BenchCase('day17.part2', with_file(17, 'example.txt', day17.parse_initial_state), day17.part2, slow = True),
+    BenchCase('day18.part1', with_file(18, 'example.txt', day18.parse_expressions), day18.part1),
+    BenchCase('day18.part2', with_file(18, 'example.txt', day18.parse_expressions), day18.part2),
+    BenchCase('day19.part1', lambda use_input: day19.parse_input(pick_input(19, 'example3.txt', use_input)), day19.part1),
+    BenchCase('day19.part2', lambda use_input: day19.parse_input(pick_input(19, 'example3.txt', use_input)), day19.part2),
+    BenchCase('day20.part1', with_file(20, 'example.txt', day20.parse_tiles), day20.part1),
+    BenchCase('day21.part1', with_file(21, 'example.txt', day21.parse_foods), day21.part1),
+    BenchCase('day21.part2', with_file(21, 'example.txt', day21.parse_foods), day21.part2),
+    BenchCase('day22.part1', with_file(22, 'example.txt', day22.parse_decks), day22.part1),
+    BenchCase('day22.part2', with_file(22, 'example.txt', day22.parse_decks), day22.part2),
+    BenchCase('day23.part1', lambda use_input: ([int(c) for c in ('963275481' if use_input else '389125467')],), day23.part1),
+    BenchCase('day23.part2', lambda use_input: ([int(c) for c in ('963275481' if use_input else '389125467')],), day23.part2, slow = True),
+    BenchCase('day24.part1', with_file(24, 'example.txt', day24.parse_directions), day24.part1),
+    BenchCase('day24.part2', lambda use_input: (day24.flip_initial_tiles(day24.parse_directions(pick_input(24, 'example.txt', use_input))),),
+        day24.part2, slow = True),
+    BenchCase('day25.part1', lambda use_input: (7, (8335663, 8614349) if use_input else (5764801, 17807724)), day25.part1),
+]
+
+def run_case(case: BenchCase, *, warmup: int, repeat: int, use_input: bool = False) -> BenchResult:
+    for _ in range(warmup):
+        case.fn(*case.setup(use_input))
+
+    samples = list[int]()
+    for _ in range(repeat):
+        args = case.setup(use_input)
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = time.perf_counter_ns()
+            case.fn(*args)
+            samples.append(time.perf_counter_ns() - start)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    return BenchResult(case.name, samples)
+
+def select_cases(names: list[str], include_slow: bool) -> list[BenchCase]:
+    if names:
+        # a name selects a case exactly, or all the cases of a day (e.g. `day14`)
+        return [c for c in CASES if any(c.name == n or c.name.startswith(n + '.') for n in names)]
+    else:
+        return [c for c in CASES if include_slow or not c.slow]
+
+def to_json(results: list[BenchResult], *, warmup: int, repeat: int, use_input: bool) -> dict:
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'timestamp': time.time(),
+        'warmup': warmup,
+        'repeat': repeat,
+        'use_input': use_input,
+        'cases': { r.name: { **r.stats, 'samples_ns': r.samples_ns } for r in results },
+    }
+
+def compare(current: dict, baseline: dict, threshold: float, metric: str = 'median_ns') -> list[tuple[str, float, float, float]]:
+    '''
+    Returns `(name, baseline, current, ratio)` for each case present in both reports whose `metric`
+    got slower than the baseline by more than `threshold` (e.g. 0.1 for 10%).
+    '''
+    regressions = list[tuple[str, float, float, float]]()
+    for name, stats in current['cases'].items():
+        if name not in baseline['cases']:
+            continue
+
+        base_value = baseline['cases'][name][metric]
+        ratio = stats[metric] / base_value if base_value > 0 else math.inf
+        if ratio > 1 + threshold:
+            regressions.append((name, base_value, stats[metric], ratio))
+
+    return regressions
+
+def format_ns(ns: float) -> str:
+    if ns >= 1_000_000_000:
+        return f'{ns / 1_000_000_000:.3f} s'
+    elif ns >= 1_000_000:
+        return f'{ns / 1_000_000:.3f} ms'
+    else:
+        return f'{ns / 1_000:.1f} us'
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description = 'Benchmark the parts of each day with repeated runs.')
+    parser.add_argument('cases', nargs = '*', help = 'cases (e.g. day14.part2) or days (e.g. day14) to run (default: all the non-slow cases)')
+    parser.add_argument('--all', action = 'store_true', help = 'also run the slow cases')
+    parser.add_argument('--warmup', type = int, default = 1, help = 'untimed runs before sampling (default: 1)')
+    parser.add_argument('--repeat', type = int, default = 10, help = 'timed runs per case (default: 10)')
+    parser.add_argument('--output', help = 'write the results as JSON to this file')
+    parser.add_argument('--baseline', help = 'JSON results to compare the median against')
+    parser.add_argument('--threshold', type = float, default = 0.1, help = 'relative slowdown flagged as regression (default: 0.1)')
+    parser.add_argument('--input', action = 'store_true', help = "run on each day's input.txt when it exists instead of its example")
+    parser.add_argument('--list', action = 'store_true', help = 'list the available cases and exit')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for case in CASES:
+            print(case.name, '(slow)' if case.slow else '')
+        return 0
+
+    results = list[BenchResult]()
+    for case in select_cases(args.cases, args.all):
+        result = run_case(case, warmup = args.warmup, repeat = args.repeat, use_input = args.input)
+        stats = result.stats
+        print(f'{case.name:12} min {format_ns(stats["min_ns"]):>12}  median {format_ns(stats["median_ns"]):>12}  p95 {format_ns(stats["p95_ns"]):>12}')
+        results.append(result)
+
+    report = to_json(results, warmup = args.warmup, repeat = args.repeat, use_input = args.input)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent = 2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        if baseline.get('use_input', False) != args.input:
+            print(f'WARNING: the baseline was run {"without" if args.input else "with"} --input, so it measured other inputs', file = sys.stderr)
+
+        regressions = compare(report, baseline, args.threshold)
+        for name, base_value, value, ratio in regressions:
+            print(f'REGRESSION {name}: {format_ns(base_value)} -> {format_ns(value)} ({ratio:.2f}x)')
+
+        if regressions:
+            return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+from __future__ import annotations
+from functools import wraps
+from os import path
+from types import ModuleType
+from typing import Any, Callable, Iterable, Optional
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+ROOT_DIR = path.dirname(path.abspath(__file__))
+DEFAULT_CACHE_DIR = path.join(ROOT_DIR, '.cache')
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+MISSING = object()
+
+class ResultCache:
+    '''
+    On-disk cache of solver results, content-addressed by the bytes of the input files, the call arguments
+    and the source of the solver module (and the repo modules it uses). Entries are evicted least recently
+    used first once the cache grows over `max_bytes`.
+    '''
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, *, max_bytes: int = DEFAULT_MAX_BYTES, enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled and os.environ.get('AOC_NO_CACHE', '') == ''
+
+    def make_key(self, *parts: bytes) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            # length-prefix each part so that different splits of the same bytes don't collide
+            digest.update(len(part).to_bytes(8, 'little'))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return path.join(self.cache_dir, key + '.pkl')
+
+    def get(self, key: str) -> Any:
+        if not self.enabled:
+            return MISSING
+
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'rb') as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return MISSING
+
+        # the modification time doubles as the last access time for the LRU eviction
+        os.utime(entry_path)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok = True)
+        # write to a temporary file and rename it, so that concurrent readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir = self.cache_dir, suffix = '.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(value, f, protocol = pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._entry_path(key))
+        self.evict()
+
+    def evict(self) -> None:
+        entries = list[tuple[float, int, str]]()
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.pkl'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+
+    def clear(self) -> None:
+        if path.isdir(self.cache_dir):
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(('.pkl', '.tmp')):
+                    os.remove(entry.path)
+
+def hash_files(file_paths: Iterable[str]) -> bytes:
+    digest = hashlib.sha256()
+    for file_path in sorted(file_paths):
+        digest.update(file_path.encode())
+        with open(file_path, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.digest()
+
+def get_repo_modules(module: ModuleType) -> list[ModuleType]:
+    '''
+    Returns `module` and the modules from this repo it refers to in its globals (e.g. day9 uses day1).
+    '''
+    modules = { module.__name__: module }
+    for value in vars(module).values():
+        dep = value if isinstance(value, ModuleType) else sys.modules.get(getattr(value, '__module__', '') or '')
+        dep_file = getattr(dep, '__file__', None)
+        if dep is not None and dep_file and path.abspath(dep_file).startswith(ROOT_DIR + os.sep):
+            modules[dep.__name__] = dep
+    return list(modules.values())
+
+def hash_module_source(module: ModuleType) -> bytes:
+    return hash_files(module_file(m) for m in get_repo_modules(module))
+
+def module_file(module: ModuleType) -> str:
+    assert module.__file__ is not None
+    return path.abspath(module.__file__)
+
+def find_input_files(module: ModuleType, args: Iterable[Any]) -> list[str]:
+    '''
+    String arguments naming existing files next to the solver module are considered input files.
+    '''
+    module_dir = path.dirname(module_file(module))
+    return [
+        path.join(module_dir, arg)
+        for arg
+        in args
+        if isinstance(arg, str) and path.isfile(path.join(module_dir, arg))
+    ]
+
+DEFAULT_CACHE = ResultCache()
+
+def cached(fn: Optional[Callable] = None, *, cache: Optional[ResultCache] = None) -> Any:
+    '''
+    Decorator caching the return value of a solver function. Pass `bypass_cache = True` to a call to force
+    recomputing it (the fresh result is still stored).
+    '''
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, bypass_cache: bool = False, **kwargs):
+            the_cache = cache or DEFAULT_CACHE
+            module = sys.modules[fn.__module__]
+            all_args = list(args) + list(kwargs.values())
+            key = the_cache.make_key(
+                fn.__qualname__.encode(),
+                hash_module_source(module),
+                hash_files(find_input_files(module, all_args)),
+                repr((args, sorted(kwargs.items()))).encode())
+
+            if not bypass_cache:
+                value = the_cache.get(key)
+                if value is not MISSING:
+                    return value
+
+            value = fn(*args, **kwargs)
+            the_cache.put(key, value)
+            return value
+
+        return wrapper
+
+    return decorator(fn) if fn is not None else decorator
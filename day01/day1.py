@@ -1,5 +1,8 @@
+from bisect import bisect_left
+from itertools import combinations
+from math import prod
 from os import path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
 def find_pair(num_array: list[int], expected_sum: int) -> Optional[tuple[int, int]]:
     expected_nums = set()
@@ -18,6 +21,51 @@ def read_file(input_file: str) -> list[int]:
     with open(full_path) as f:
         return [int(line) for line in f.readlines()]
 
+def stream_numbers(input_file: str) -> Iterator[int]:
+    full_path = path.join(path.dirname(__file__), input_file)
+    with open(full_path) as f:
+        for line in f:
+            if line.strip():
+                yield int(line)
+
+def find_pair_streaming(nums: Iterable[int], expected_sum: int, *, value_range: Optional[range] = None, max_set_size: int = 1000000) -> Optional[tuple[int, int]]:
+    '''
+    Same as `find_pair`, but consumes `nums` lazily and stops at the first match. The numbers seen so far
+    are kept in a set, and when `value_range` is known they are moved to a bitmap (one bit per value in
+    the range) once the set grows over `max_set_size`. Memory is only bounded when `value_range` is given:
+    without it, `max_set_size` is ignored and the set grows with the distinct numbers of the stream.
+    Every number is checked against `value_range`, so an out of range number always raises.
+    '''
+    seen_nums = set[int]()
+    seen_bitmap: Optional[bytearray] = None
+    for num in nums:
+        if value_range is not None and num not in value_range:
+            raise Exception(f'Number {num} outside of the expected range {value_range}')
+
+        complement = expected_sum - num
+        if seen_bitmap is None:
+            if complement in seen_nums:
+                return (num, complement)
+            seen_nums.add(num)
+
+            if value_range is not None and len(seen_nums) > max_set_size:
+                seen_bitmap = bytearray((len(value_range) + 7) // 8)
+                for seen_num in seen_nums:
+                    set_bit(seen_bitmap, value_range, seen_num)
+                seen_nums = set()
+        else:
+            if complement in value_range and has_bit(seen_bitmap, value_range, complement):
+                return (num, complement)
+            set_bit(seen_bitmap, value_range, num) # type: ignore
+
+def set_bit(bitmap: bytearray, value_range: range, num: int) -> None:
+    idx = num - value_range.start
+    bitmap[idx >> 3] |= 1 << (idx & 7)
+
+def has_bit(bitmap: bytearray, value_range: range, num: int) -> bool:
+    idx = num - value_range.start
+    return bitmap[idx >> 3] & (1 << (idx & 7)) != 0
+
 def find_triple(num_array: list[int], expected_sum: int) -> Optional[tuple[int, int, int]]:
     for idx, num in enumerate(num_array):
         sub_array = num_array[(idx + 1):]
@@ -25,9 +73,80 @@ def find_triple(num_array: list[int], expected_sum: int) -> Optional[tuple[int,
         if pair is not None:
             return (num,) + pair # type: ignore
 
+def find_k_sum(num_array: list[int], expected_sum: int, k: int) -> Optional[tuple[int, ...]]:
+    return find_k_sums(num_array, [expected_sum], k)[expected_sum]
+
+def find_k_sums(num_array: list[int], expected_sums: Iterable[int], k: int) -> dict[int, Optional[tuple[int, ...]]]:
+    '''
+    Finds `k` numbers (at different positions) of `num_array` adding up to each of the `expected_sums`.
+    The array is sorted once for all the queries. Up to k = 3 we fix the first numbers and scan the rest
+    with two pointers, O(n^(k-1)), above that we meet in the middle with a table of the sums of k - k // 2
+    numbers, also built once for all the queries.
+    '''
+    if k < 1:
+        raise Exception(f'Can only find sums of at least 1 number, got k = {k}')
+
+    sorted_nums = sorted(num_array)
+    if k <= 3:
+        return { s: find_k_sum_sorted(sorted_nums, s, k, 0) for s in expected_sums }
+    else:
+        half_sums = build_half_sums(sorted_nums, k - k // 2)
+        return { s: find_k_sum_halves(sorted_nums, s, k // 2, half_sums) for s in expected_sums }
+
+def find_k_sum_sorted(sorted_nums: list[int], expected_sum: int, k: int, start: int) -> Optional[tuple[int, ...]]:
+    n = len(sorted_nums)
+    if k == 1:
+        idx = bisect_left(sorted_nums, expected_sum, start)
+        return (expected_sum,) if idx < n and sorted_nums[idx] == expected_sum else None
+
+    if k == 2:
+        lo, hi = start, n - 1
+        while lo < hi:
+            pair_sum = sorted_nums[lo] + sorted_nums[hi]
+            if pair_sum == expected_sum:
+                return (sorted_nums[lo], sorted_nums[hi])
+            elif pair_sum < expected_sum:
+                lo += 1
+            else:
+                hi -= 1
+        return None
+
+    largest_rest_sum = sum(sorted_nums[(n - k + 1):])
+    for idx in range(start, n - k + 1):
+        num = sorted_nums[idx]
+        # the smallest sum from here on is already too big, and the following ones only get bigger
+        if sum(sorted_nums[idx:(idx + k)]) > expected_sum:
+            break
+        # even the largest sum with this number is too small
+        if num + largest_rest_sum < expected_sum:
+            continue
+
+        rest = find_k_sum_sorted(sorted_nums, expected_sum - num, k - 1, idx + 1)
+        if rest is not None:
+            return (num,) + rest
+
+def build_half_sums(sorted_nums: list[int], k: int) -> dict[int, tuple[int, ...]]:
+    '''
+    Maps each sum of `k` numbers to the indices of the numbers adding up to it. Among the ways of getting the
+    same sum we keep the one starting at the highest index, as it combines with the most lower halves.
+    '''
+    half_sums = dict[int, tuple[int, ...]]()
+    for idxs in combinations(range(len(sorted_nums)), k):
+        half_sum = sum(sorted_nums[i] for i in idxs)
+        if half_sum not in half_sums or half_sums[half_sum][0] < idxs[0]:
+            half_sums[half_sum] = idxs
+    return half_sums
+
+def find_k_sum_halves(sorted_nums: list[int], expected_sum: int, k: int, half_sums: dict[int, tuple[int, ...]]) -> Optional[tuple[int, ...]]:
+    for idxs in combinations(range(len(sorted_nums)), k):
+        # the upper half must only use indices after this lower half, so that no number is used twice
+        upper_idxs = half_sums.get(expected_sum - sum(sorted_nums[i] for i in idxs))
+        if upper_idxs is not None and upper_idxs[0] > idxs[-1]:
+            return tuple(sorted_nums[i] for i in idxs + upper_idxs)
+
 def solve_part2(num_array, expected_sum):
-    (a, b, c) = find_triple(num_array, expected_sum) # type: ignore
-    return a * b * c
+    # (a, b, c) = find_triple(num_array, expected_sum) # type: ignore
+    return prod(find_k_sum(num_array, expected_sum, 3)) # type: ignore
 
 if __name__ == '__main__':
     num_array = read_file('input.txt')
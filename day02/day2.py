@@ -1,8 +1,28 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
 from os import path
-from typing import Callable
+from typing import Callable, Optional
+import mmap
+import operator
+import os
 
 Policy = tuple[int, int, str, str]
 
+@dataclass
+class PolicyColumns:
+    '''
+    The policies of a file as columns, split out of the raw bytes in bulk instead of one tuple per line.
+    '''
+    fsts: array # first number of each policy (min occurrences or first position)
+    snds: array # second number (max occurrences or second position)
+    letters: bytes # one byte per policy
+    passwords: list[bytes]
+
+    def __len__(self) -> int:
+        return len(self.letters)
+
 def parse_policy(input_line: str) -> Policy:
     (policy, _, password) = input_line.partition(': ')
     (prange, _, pletter) = policy.partition(' ')
@@ -24,12 +44,103 @@ def validate_policy_part2(fstPos: int, sndPos: int, letter: str, password: str)
     return fstMatches != sndMatches
 
 def solve(password_policies: list[Policy], validation_fn: Callable) -> int:
-    return [
-        validation_fn(a, b, letter, password)
+    return sum(
+        1
         for (a, b, letter, password)
-        in password_policies].count(True)
-  
+        in password_policies
+        if validation_fn(a, b, letter, password))
+
+def parse_policy_columns(data: bytes) -> PolicyColumns:
+    # every line is `<fst>-<snd> <letter>: <password>`, i.e. three whitespace separated tokens
+    tokens = data.split()
+    if len(tokens) % 3 != 0:
+        raise Exception('Unexpected policy format')
+
+    nums = b' '.join(tokens[0::3]).replace(b'-', b' ').split()
+    return PolicyColumns(
+        fsts = array('I', map(int, nums[0::2])),
+        snds = array('I', map(int, nums[1::2])),
+        letters = b''.join(tokens[1::3])[0::2], # drop the ':' after each letter
+        passwords = tokens[2::3])
+
+def parse_file_columns(input_file: str) -> PolicyColumns:
+    full_path = path.join(path.dirname(__file__), input_file)
+    with open(full_path, 'rb') as f:
+        return parse_policy_columns(f.read())
+
+# The counters below chain `map`s over the columns, so the per-policy work all happens in C
+
+def count_valid_part1(cols: PolicyColumns) -> int:
+    counts = array('I', map(bytes.count, cols.passwords, cols.letters))
+    return sum(map(operator.and_, map(operator.le, cols.fsts, counts), map(operator.le, counts, cols.snds)))
+
+def count_valid_part2(cols: PolicyColumns) -> int:
+    fst_letters = map(operator.getitem, cols.passwords, map(operator.sub, cols.fsts, repeat(1)))
+    snd_letters = map(operator.getitem, cols.passwords, map(operator.sub, cols.snds, repeat(1)))
+    return sum(map(operator.ne, map(operator.eq, fst_letters, cols.letters), map(operator.eq, snd_letters, cols.letters)))
+
+COLUMN_VALIDATORS: dict[Callable, Callable[[PolicyColumns], int]] = {
+    validate_policy_part1: count_valid_part1,
+    validate_policy_part2: count_valid_part2,
+}
+
+def count_valid(cols: PolicyColumns, validation_fn: Callable) -> int:
+    '''
+    Counts the valid policies with the column version of `validation_fn` if there is one,
+    otherwise decodes each policy and calls `validation_fn` on it.
+    '''
+    if validation_fn in COLUMN_VALIDATORS:
+        return COLUMN_VALIDATORS[validation_fn](cols)
+
+    return sum(
+        1
+        for a, b, letter, password
+        in zip(cols.fsts, cols.snds, cols.letters, cols.passwords)
+        if validation_fn(a, b, chr(letter), password.decode()))
+
+def find_chunk_bounds(data: mmap.mmap, chunk_size: int) -> list[tuple[int, int]]:
+    '''
+    Splits `data` in chunks of about `chunk_size` bytes, each ending right after a newline.
+    '''
+    bounds = list[tuple[int, int]]()
+    start = 0
+    while start < len(data):
+        newline = data.find(b'\n', min(start + chunk_size, len(data)) - 1)
+        end = newline + 1 if newline >= 0 else len(data)
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+def count_valid_chunk(full_path: str, start: int, end: int, validation_fn: Callable) -> int:
+    with open(full_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as data:
+        return count_valid(parse_policy_columns(data[start:end]), validation_fn)
+
+def solve_parallel(input_file: str, validation_fn: Callable, *, max_workers: Optional[int] = None, chunk_size: Optional[int] = None) -> int:
+    '''
+    Memory-maps the file and validates newline-aligned chunks of it in a process pool, each worker mapping
+    the file itself so that only the chunk bounds are sent over. `validation_fn` must be picklable, i.e.
+    a module-level function.
+    '''
+    full_path = path.join(path.dirname(__file__), input_file)
+    if path.getsize(full_path) == 0:
+        return 0
+
+    max_workers = max_workers or os.cpu_count() or 1
+    with open(full_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as data:
+        # by default a few chunks per worker, so that uneven chunks still keep all workers busy
+        chunk_size = chunk_size or max(len(data) // (4 * max_workers), 1)
+        bounds = find_chunk_bounds(data, chunk_size)
+
+    with ProcessPoolExecutor(max_workers = max_workers) as executor:
+        counts = executor.map(
+            count_valid_chunk,
+            repeat(full_path),
+            (start for start, _ in bounds),
+            (end for _, end in bounds),
+            repeat(validation_fn))
+        return sum(counts)
+
 if __name__ == '__main__':
-    pwd_policies = parse_file('input.txt')
-    print('Part 1 answer:', solve(pwd_policies, validate_policy_part1))
-    print('Part 2 answer:', solve(pwd_policies, validate_policy_part2))
\ No newline at end of file
+    pwd_policies = parse_file_columns('input.txt')
+    print('Part 1 answer:', count_valid(pwd_policies, validate_policy_part1))
+    print('Part 2 answer:', count_valid(pwd_policies, validate_policy_part2))
\ No newline at end of file
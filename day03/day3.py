@@ -1,5 +1,11 @@
+from __future__ import annotations
+from dataclasses import dataclass
 from functools import reduce
+from math import gcd
 from os import path
+from typing import Protocol
+import mmap
+import os
 
 def parse_file(input_file: str) -> list[str]:
     full_path = path.join(path.dirname(__file__), input_file)
@@ -21,11 +27,106 @@ def count_trees_on_slope(travel_map: list[str], dx: int, dy: int, x = 0, y = 0)
     
     return top_trees + rest_trees
 
+TREE_BITS_TABLE = str.maketrans('#.', '10')
+
+@dataclass
+class TreeGrid:
+    width: int
+    rows: list[int] # bit x of each row is set if there's a tree at column x
+
+    @staticmethod
+    def parse(travel_map: list[str]) -> TreeGrid:
+        # reversed, so that the first column ends up as the least significant bit
+        return TreeGrid(
+            width = len(travel_map[0]) if travel_map else 0,
+            rows = [int(row[::-1].translate(TREE_BITS_TABLE), 2) for row in travel_map])
+
+    @property
+    def height(self) -> int:
+        return len(self.rows)
+
+    def is_tree_at(self, x: int, y: int) -> bool:
+        return (self.rows[y] >> x) & 1 == 1
+
+class MappedTravelMap:
+    '''
+    A travel map read through a memory-mapped file. All rows have the same width, so row `y` starts at
+    `y * stride` and only the rows that are actually read get loaded from disk.
+    Views returned by `row` must be released before closing the map.
+    '''
+
+    TREE = ord('#')
+
+    def __init__(self, full_path: str):
+        self._file = open(full_path, 'rb')
+        # empty files can't be mapped, but they're just maps without rows
+        self.data: mmap.mmap | bytes = b''
+        if os.fstat(self._file.fileno()).st_size > 0:
+            self.data = mmap.mmap(self._file.fileno(), 0, access = mmap.ACCESS_READ)
+
+        first_newline = self.data.find(b'\n')
+        if first_newline < 0:
+            self.stride = len(self.data) + 1
+            self.width = len(self.data)
+        else:
+            self.stride = first_newline + 1
+            self.width = first_newline - 1 if first_newline > 0 and self.data[first_newline - 1] == ord('\r') else first_newline
+
+        # the last row may be missing its line terminator, and trailing blank lines aren't rows
+        data_end = len(self.data)
+        while data_end > 0 and self.data[data_end - 1] in b'\r\n':
+            data_end -= 1
+        self.height = (data_end + self.stride - 1) // self.stride
+
+    @staticmethod
+    def open(input_file: str) -> MappedTravelMap:
+        return MappedTravelMap(path.join(path.dirname(__file__), input_file))
+
+    def row(self, y: int) -> memoryview:
+        start = y * self.stride
+        return memoryview(self.data)[start:(start + self.width)]
+
+    def is_tree_at(self, x: int, y: int) -> bool:
+        return self.data[y * self.stride + x] == self.TREE
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+    def __enter__(self) -> MappedTravelMap:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+class Grid(Protocol):
+    width: int
+    height: int
+
+    def is_tree_at(self, x: int, y: int) -> bool: ...
+
+def count_trees_on_slopes(grid: Grid, slopes: list[tuple[int, int]]) -> list[int]:
+    '''
+    Counts the trees on all the `slopes` in a single pass over the rows, only visiting the rows
+    that some slope goes through.
+    '''
+    tree_counts = [0] * len(slopes)
+    row_step = reduce(gcd, (dy for _, dy in slopes), 0) or 1
+    for y in range(0, grid.height, row_step):
+        for idx, (dx, dy) in enumerate(slopes):
+            if y % dy == 0 and grid.is_tree_at((y // dy * dx) % grid.width, y):
+                tree_counts[idx] += 1
+
+    return tree_counts
+
 def multiply_tree_counts(travel_map: list[str], slopes: list[tuple[int, int]]):
-    tree_counts = [count_trees_on_slope(travel_map, dx, dy) for dx, dy in slopes]
+    # tree_counts = [count_trees_on_slope(travel_map, dx, dy) for dx, dy in slopes]
+    tree_counts = count_trees_on_slopes(TreeGrid.parse(travel_map), slopes)
     return reduce(lambda a, b: a * b, tree_counts)
 
 if __name__ == '__main__':
-    travel_map = parse_file('input.txt')
-    print('Part 1 answer:', count_trees_on_slope(travel_map, 3, 1))
-    print('Part 2 answer:', multiply_tree_counts(travel_map, [(1, 1), (3, 1), (5, 1), (7, 1), (1, 2)]))
\ No newline at end of file
+    with MappedTravelMap.open('input.txt') as travel_map:
+        print('Part 1 answer:', count_trees_on_slopes(travel_map, [(3, 1)])[0])
+        tree_counts = count_trees_on_slopes(travel_map, [(1, 1), (3, 1), (5, 1), (7, 1), (1, 2)])
+        print('Part 2 answer:', reduce(lambda a, b: a * b, tree_counts))
\ No newline at end of file
@@ -1,5 +1,11 @@
+from __future__ import annotations
+from collections import defaultdict
+from dataclasses import dataclass, field
 from os import path
+from typing import Any, Callable, Iterable, Iterator, Optional
+import json
 import re
+import time
 
 FIELD_REGEX = re.compile(r'(\w{3}):(\S+)')
 HEIGHT_REGEX = re.compile(r'(\d+)(cm|in)')
@@ -65,24 +71,226 @@ def is_valid_passport(passport_text: str, deep_validation: bool):
 
     return True
 
-def count_valid_passports(passport_texts: list[str], deep_validation: bool):
-    return len([
-        pp_text
-        for pp_text
-        in passport_texts
-        if is_valid_passport(pp_text, deep_validation)
-    ])
+def read_passports(lines: Iterable[str]) -> Iterator[str]:
+    '''
+    Yields the blank-line separated passports of `lines` one at a time, e.g. straight from an open file.
+    '''
+    record_lines = list[str]()
+    for line in lines:
+        line = line.strip()
+        if line:
+            record_lines.append(line)
+        elif record_lines:
+            yield ' '.join(record_lines)
+            record_lines = []
 
-def solve(input_file: str):
-    print(f'[{input_file}]')
+    if record_lines:
+        yield ' '.join(record_lines)
+
+# Ordered from cheapest to most expensive, so that invalid passports are rejected as early as possible
+DEEP_FIELD_VALIDATORS: list[tuple[str, Callable[[str], bool]]] = [
+    ('ecl', validate_eye_color),
+    ('byr', lambda text: validate_year(text, 1920, 2002)),
+    ('iyr', lambda text: validate_year(text, 2010, 2020)),
+    ('eyr', lambda text: validate_year(text, 2020, 2030)),
+    ('pid', validate_passport_id),
+    ('hcl', validate_color),
+    ('hgt', validate_height),
+]
+
+def compile_validator(deep_validation: bool) -> Callable[[str], bool]:
+    field_validators = DEEP_FIELD_VALIDATORS if deep_validation else []
+    mandatory_fields = frozenset(MANDATORY_FIELDS)
+    findall = FIELD_REGEX.findall
+
+    def validate(passport_text: str) -> bool:
+        pp_fields = dict(findall(passport_text))
+        return mandatory_fields <= pp_fields.keys() and all(
+            validate_field(pp_fields[field])
+            for field, validate_field
+            in field_validators)
+
+    return validate
+
+def count_valid_passports(passport_texts: Iterable[str], deep_validation: bool, rule_set: Optional[RuleSet] = None):
+    if rule_set is None:
+        validate = compile_validator(deep_validation)
+    else:
+        validate = rule_set.compile(deep_validation = deep_validation)
+    return sum(1 for pp_text in passport_texts if validate(pp_text))
+
+# Integer ranges up to this size are compiled to a set of the valid strings, replacing parsing and comparing
+MAX_RANGE_TABLE_SIZE = 100000
+
+@dataclass
+class Rule:
+    field: str
+    kind: str # one of the keys of RULE_COMPILERS
+    params: dict[str, Any]
+
+    @property
+    def name(self) -> str:
+        return f'{self.field}:{self.kind}'
+
+@dataclass
+class RuleStats:
+    '''
+    How many times each rule was checked, how many of those failed and the time spent on it.
+    '''
+    checks: defaultdict[str, int] = field(default_factory = lambda: defaultdict(int))
+    failures: defaultdict[str, int] = field(default_factory = lambda: defaultdict(int))
+    time_ns: defaultdict[str, int] = field(default_factory = lambda: defaultdict(int))
+
+    def __str__(self) -> str:
+        return '\n'.join(
+            f'{name}: {self.checks[name]} checks, {self.failures[name]} failed, {self.time_ns[name]} ns'
+            for name
+            in sorted(self.checks, key = lambda name: -self.time_ns[name]))
+
+def compile_one_of(params: dict[str, Any]) -> Callable[[str], bool]:
+    return frozenset(params['values']).__contains__
+
+def compile_int_range(params: dict[str, Any]) -> Callable[[str], bool]:
+    min_value, max_value = params['min'], params['max']
+    validate = lambda text: validate_year(text, min_value, max_value)
+    if max_value - min_value >= MAX_RANGE_TABLE_SIZE:
+        return validate
+
+    # the canonical spellings hit the table, anything else (e.g. leading zeros) falls back to parsing
+    table = frozenset(str(n) for n in range(min_value, max_value + 1))
+    return lambda text: text in table or validate(text)
+
+def compile_unit_range(params: dict[str, Any]) -> Callable[[str], bool]:
+    units: dict[str, list[int]] = params['units']
+    unit_regex = re.compile(r'(\d+)(' + '|'.join(map(re.escape, units)) + ')')
+    def validate(text: str) -> bool:
+        match = unit_regex.fullmatch(text)
+        if match is None:
+            return False
+        min_value, max_value = units[match.group(2)]
+        return min_value <= int(match.group(1)) <= max_value
+
+    if any(max_value - min_value >= MAX_RANGE_TABLE_SIZE for min_value, max_value in units.values()):
+        return validate
+
+    table = frozenset(
+        f'{n}{unit}'
+        for unit, (min_value, max_value)
+        in units.items()
+        for n
+        in range(min_value, max_value + 1))
+    return lambda text: text in table or validate(text)
+
+def compile_regex(params: dict[str, Any]) -> Callable[[str], bool]:
+    fullmatch = re.compile(params['pattern']).fullmatch
+    return lambda text: fullmatch(text) is not None
+
+RULE_COMPILERS: dict[str, Callable[[dict[str, Any]], Callable[[str], bool]]] = {
+    'one_of': compile_one_of,
+    'int_range': compile_int_range,
+    'unit_range': compile_unit_range,
+    'regex': compile_regex,
+}
+
+@dataclass
+class RuleSet:
+    mandatory_fields: frozenset[str]
+    rules: list[Rule] # checked in order, so cheaper and more selective rules should come first
+
+    @staticmethod
+    def load(rules_file: str) -> RuleSet:
+        with open(rules_file) as f:
+            config = json.load(f)
+
+        rules = [
+            Rule(rule_config['field'], rule_config['type'], { k: v for k, v in rule_config.items() if k not in ('field', 'type') })
+            for rule_config
+            in config['rules']
+        ]
+        for rule in rules:
+            if rule.kind not in RULE_COMPILERS:
+                raise Exception(f'Unknown rule type: {rule.kind}')
+
+        return RuleSet(frozenset(config['mandatory']), rules)
+
+    def fuse_rules(self) -> list[tuple[str, list[Rule]]]:
+        '''
+        Groups the rules by field (in order of first appearance) and fuses all the regexes of a field into one.
+        '''
+        rules_by_field = dict[str, list[Rule]]()
+        for rule in self.rules:
+            rules_by_field.setdefault(rule.field, []).append(rule)
+
+        fused = list[tuple[str, list[Rule]]]()
+        for field_name, rules in rules_by_field.items():
+            regex_rules = [r for r in rules if r.kind == 'regex']
+            if len(regex_rules) > 1:
+                # each pattern must match the whole text, so all but the last become lookaheads
+                *lookaheads, last = [r.params['pattern'] for r in regex_rules]
+                pattern = ''.join(f'(?=(?:{p})$)' for p in lookaheads) + f'(?:{last})'
+                rules = [r for r in rules if r.kind != 'regex'] + [Rule(field_name, 'regex', { 'pattern': pattern })]
+            fused.append((field_name, rules))
+
+        return fused
+
+    def compile(self, *, deep_validation: bool = True, stats: Optional[RuleStats] = None) -> Callable[[str], bool]:
+        mandatory_fields = self.mandatory_fields
+        checks = list[tuple[str, str, Callable[[Optional[str]], bool]]]()
+        if deep_validation:
+            for field_name, rules in self.fuse_rules():
+                for rule in rules:
+                    check = RULE_COMPILERS[rule.kind](rule.params)
+                    if field_name not in mandatory_fields:
+                        # optional fields are only validated when present
+                        check = lambda text, check = check: text is None or check(text)
+                    checks.append((rule.name, field_name, check))
+
+        findall = FIELD_REGEX.findall
+
+        if stats is None:
+            def validate(passport_text: str) -> bool:
+                pp_fields = dict(findall(passport_text))
+                return mandatory_fields <= pp_fields.keys() and all(
+                    check(pp_fields.get(field_name))
+                    for _, field_name, check
+                    in checks)
+
+            return validate
+
+        # instrumented version, slower but reports what each rule costs
+        def validate_with_stats(passport_text: str) -> bool:
+            pp_fields = dict(findall(passport_text))
+            stats.checks['mandatory'] += 1
+            if not mandatory_fields <= pp_fields.keys():
+                stats.failures['mandatory'] += 1
+                return False
+
+            for name, field_name, check in checks:
+                start = time.perf_counter_ns()
+                passed = check(pp_fields.get(field_name))
+                stats.time_ns[name] += time.perf_counter_ns() - start
+                stats.checks[name] += 1
+                if not passed:
+                    stats.failures[name] += 1
+                    return False
+
+            return True
+
+        return validate_with_stats
+
+def solve(input_file: str, rules_file: Optional[str] = None):
+    print(f'[{input_file}]' if rules_file is None else f'[{input_file} with {rules_file}]')
     full_path = path.join(path.dirname(__file__), input_file)
-    passport_texts = parse_passports(full_path)
-    print('Part 1 answer:', count_valid_passports(passport_texts, deep_validation = False))
-    print('Part 2 answer:', count_valid_passports(passport_texts, deep_validation = True))
+    rule_set = RuleSet.load(path.join(path.dirname(__file__), rules_file)) if rules_file else None
+    with open(full_path) as f:
+        print('Part 1 answer:', count_valid_passports(read_passports(f), deep_validation = False, rule_set = rule_set))
+    with open(full_path) as f:
+        print('Part 2 answer:', count_valid_passports(read_passports(f), deep_validation = True, rule_set = rule_set))
     print()
 
 if __name__ == '__main__':
     solve('example.txt')
     solve('example2_invalid.txt')
     solve('example2_valid.txt')
+    solve('example2_valid.txt', 'rules.json')
     solve('input.txt')
\ No newline at end of file
@@ -1,5 +1,7 @@
+from array import array
+from itertools import repeat
 from os import path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 import re
 
 class Coord:
@@ -66,8 +68,53 @@ def solve_take2(input_file: str):
     print('Part 2 answer:', find_empty_seat(seat_ids))
     print()
 
+# F/L select the lower half and B/R the upper half, so the whole code is the seat id in binary
+SEAT_CODE_TABLE = bytes.maketrans(b'FBLR', b'0101')
+
+def decode_seat_ids(data: bytes) -> array:
+    '''
+    Decodes all the boarding passes in `data` at once, translating the whole buffer to binary digits first.
+    '''
+    binary_codes = data.translate(SEAT_CODE_TABLE).split()
+    return array('I', map(int, binary_codes, repeat(2)))
+
+def build_occupancy(seat_ids: Iterable[int], max_seat_id: int) -> bytearray:
+    occupancy = bytearray(max_seat_id + 1)
+    for seat_id in seat_ids:
+        occupancy[seat_id] = 1
+    return occupancy
+
+def find_empty_seat_bitmap(occupancy: bytearray) -> Optional[int]:
+    # like `find_empty_seat`, the seat right before the first taken one that follows a gap
+    gap_start = occupancy.find(0, max(occupancy.find(1), 0))
+    if gap_start == -1:
+        return None
+    return occupancy.find(1, gap_start) - 1
+
+def find_missing_seats(occupancy: bytearray) -> Iterator[int]:
+    '''
+    Yields every free seat between the first and the last taken ones.
+    '''
+    seat_id = occupancy.find(0, max(occupancy.find(1), 0))
+    while seat_id != -1:
+        yield seat_id
+        seat_id = occupancy.find(0, seat_id + 1)
+
+def solve_take3(input_file: str):
+    print(f'[{input_file}] v3')
+    full_path = path.join(path.dirname(__file__), input_file)
+    with open(full_path, 'rb') as f:
+        seat_ids = decode_seat_ids(f.read())
+    max_seat_id = max(seat_ids)
+    occupancy = build_occupancy(seat_ids, max_seat_id)
+    print('Part 1 answer:', max_seat_id)
+    print('Part 2 answer:', find_empty_seat_bitmap(occupancy))
+    print()
+
 if __name__ == '__main__':
     solve('example.txt')
     solve('input.txt')
     solve_take2('example.txt')
-    solve_take2('input.txt')
\ No newline at end of file
+    solve_take2('input.txt')
+    solve_take3('example.txt')
+    solve_take3('input.txt')
\ No newline at end of file
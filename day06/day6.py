@@ -1,6 +1,7 @@
 from itertools import chain
 from functools import reduce
 from os import path
+from typing import Iterable
 
 def parse_answer_groups(input_file: str) -> list[list[str]]:
     with open(input_file) as f:
@@ -21,6 +22,40 @@ def get_common_answers(answer_group: list[str]) -> set[str]:
             answer_group[1:],
             set(answer_group[0]))
 
+# bit i of an answer mask is set when question chr(ord('a') + i) was answered
+ALL_ANSWERS_MASK = (1 << 26) - 1
+ANSWER_BITS = [1 << (c - ord('a')) if ord('a') <= c <= ord('z') else 0 for c in range(256)]
+
+def answers_to_mask(answers: bytes) -> int:
+    mask = 0
+    for c in answers:
+        mask |= ANSWER_BITS[c]
+    return mask
+
+def count_group_answers(lines: Iterable[bytes]) -> tuple[int, int]:
+    '''
+    Returns the sum over all groups of the questions answered by anyone and by everyone in the group,
+    reading the groups one line at a time.
+    '''
+    total_unique = total_common = 0
+    group_union, group_intersection, in_group = 0, ALL_ANSWERS_MASK, False
+    for line in lines:
+        mask = answers_to_mask(line)
+        if mask:
+            group_union |= mask
+            group_intersection &= mask
+            in_group = True
+        elif in_group:
+            total_unique += group_union.bit_count()
+            total_common += group_intersection.bit_count()
+            group_union, group_intersection, in_group = 0, ALL_ANSWERS_MASK, False
+
+    if in_group:
+        total_unique += group_union.bit_count()
+        total_common += group_intersection.bit_count()
+
+    return total_unique, total_common
+
 def solve(input_file: str):
     print(f'[{input_file}]')
     full_path = path.join(path.dirname(__file__), input_file)
@@ -29,6 +64,17 @@ def solve(input_file: str):
     print('Part 2 answer:', sum([len(get_common_answers(g)) for g in answer_groups]))
     print()
 
+def solve_masks(input_file: str):
+    print(f'[{input_file}] masks')
+    full_path = path.join(path.dirname(__file__), input_file)
+    with open(full_path, 'rb') as f:
+        total_unique, total_common = count_group_answers(f)
+    print('Part 1 answer:', total_unique)
+    print('Part 2 answer:', total_common)
+    print()
+
 if __name__ == '__main__':
     solve('example.txt')
-    solve('input.txt')
\ No newline at end of file
+    solve('input.txt')
+    solve_masks('example.txt')
+    solve_masks('input.txt')
\ No newline at end of file
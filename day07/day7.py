@@ -1,5 +1,13 @@
+from __future__ import annotations
+from array import array
+from collections import deque
+from dataclasses import dataclass, field
 from functools import reduce
 from os import path
+from typing import Iterable, Optional
+import hashlib
+import json
+import os
 import re
 
 BAG_REGEX = re.compile(r'(\d+) (\w+ \w+) bags?')
@@ -57,6 +65,205 @@ def count_sub_bags_of(bag_type: str, rule_map: dict[str, list[SubBag]]) -> int:
     else:
         return 0
 
+@dataclass
+class BagGraph:
+    '''
+    The rules as a graph over interned bag ids, with the contents and the containers of each bag stored
+    in compact adjacency arrays: the edges of bag `i` are `[starts[i], starts[i + 1])`.
+    '''
+    colors: list[str]
+    ids: dict[str, int]
+    child_starts: array
+    child_ids: array
+    child_counts: array
+    parent_starts: array
+    parent_ids: array
+    _nested_counts: Optional[list[int]] = field(default = None, repr = False)
+
+    @staticmethod
+    def from_rules(rules: list[Rule]) -> BagGraph:
+        ids = dict[str, int]()
+        for bag_type, sub_bags in rules:
+            ids.setdefault(bag_type, len(ids))
+            for _, sub_bag_type in sub_bags:
+                ids.setdefault(sub_bag_type, len(ids))
+
+        n_bags = len(ids)
+        contents = [list[SubBag]() for _ in range(n_bags)]
+        for bag_type, sub_bags in rules:
+            contents[ids[bag_type]].extend(sub_bags)
+
+        child_starts, child_ids, child_counts = array('I', [0]), array('I'), array('I')
+        parents = [list[int]() for _ in range(n_bags)]
+        for bag_id, sub_bags in enumerate(contents):
+            for n_rep, sub_bag_type in sub_bags:
+                child_ids.append(ids[sub_bag_type])
+                child_counts.append(n_rep)
+                parents[ids[sub_bag_type]].append(bag_id)
+            child_starts.append(len(child_ids))
+
+        parent_starts, parent_ids = array('I', [0]), array('I')
+        for bag_parents in parents:
+            parent_ids.extend(bag_parents)
+            parent_starts.append(len(parent_ids))
+
+        return BagGraph(list(ids), ids, child_starts, child_ids, child_counts, parent_starts, parent_ids)
+
+    @property
+    def size(self) -> int:
+        return len(self.colors)
+
+    def children_of(self, bag_id: int) -> zip:
+        start, end = self.child_starts[bag_id], self.child_starts[bag_id + 1]
+        return zip(self.child_counts[start:end], self.child_ids[start:end])
+
+    def parents_of(self, bag_id: int) -> array:
+        return self.parent_ids[self.parent_starts[bag_id]:self.parent_starts[bag_id + 1]]
+
+    def topological_order(self) -> list[int]:
+        '''
+        Returns the bag ids with every bag before the bags that contain it, or raises if the rules have a cycle.
+        '''
+        n_pending_children = [self.child_starts[i + 1] - self.child_starts[i] for i in range(self.size)]
+        ready = deque(i for i, n in enumerate(n_pending_children) if n == 0)
+        order = list[int]()
+        while ready:
+            bag_id = ready.popleft()
+            order.append(bag_id)
+            for parent_id in self.parents_of(bag_id):
+                n_pending_children[parent_id] -= 1
+                if n_pending_children[parent_id] == 0:
+                    ready.append(parent_id)
+
+        if len(order) < self.size:
+            in_cycle = sorted(self.colors[i] for i, n in enumerate(n_pending_children) if n > 0)
+            raise Exception(f'Rules have a cycle, these bags cannot be ordered: {", ".join(in_cycle)}')
+
+        return order
+
+    def count_ancestors(self, bag_type: str) -> int:
+        # breadth-first over the containers, each bag is visited once so cycles are harmless
+        if bag_type not in self.ids:
+            return 0
+
+        visited = bytearray(self.size)
+        pending = [self.ids[bag_type]]
+        n_ancestors = 0
+        while pending:
+            for parent_id in self.parents_of(pending.pop()):
+                if not visited[parent_id]:
+                    visited[parent_id] = 1
+                    n_ancestors += 1
+                    pending.append(parent_id)
+
+        # a bag in a cycle ends up among its own containers
+        return n_ancestors - visited[self.ids[bag_type]]
+
+    def nested_counts(self) -> list[int]:
+        '''
+        The number of bags nested inside each bag, evaluated once for all bags in topological order.
+        '''
+        if self._nested_counts is None:
+            counts = [0] * self.size
+            for bag_id in self.topological_order():
+                counts[bag_id] = sum(n_rep * (1 + counts[sub_bag_id]) for n_rep, sub_bag_id in self.children_of(bag_id))
+            self._nested_counts = counts
+
+        return self._nested_counts
+
+    def count_nested(self, bag_type: str) -> int:
+        return self.nested_counts()[self.ids[bag_type]] if bag_type in self.ids else 0
+
+INDEX_VERSION = 1
+
+@dataclass
+class BagRuleIndex:
+    '''
+    The answers of both parts for every bag, precomputed once so that each query is a dictionary lookup.
+    `source_digest` identifies the rules it was built from, so that stale indexes on disk can be detected.
+    '''
+    ids: dict[str, int]
+    ancestor_counts: list[int]
+    nested_counts: list[int]
+    source_digest: str = ''
+
+    @staticmethod
+    def build(graph: BagGraph, source_digest: str = '') -> BagRuleIndex:
+        # containers come first in reverse topological order, so a bag's ancestors are complete when
+        # it's reached and can be pushed down to its contents as a bitset of bag ids
+        ancestors = [0] * graph.size
+        for bag_id in reversed(graph.topological_order()):
+            bag_ancestors = ancestors[bag_id] | (1 << bag_id)
+            for _, sub_bag_id in graph.children_of(bag_id):
+                ancestors[sub_bag_id] |= bag_ancestors
+
+        return BagRuleIndex(
+            dict(graph.ids),
+            [a.bit_count() for a in ancestors],
+            list(graph.nested_counts()),
+            source_digest)
+
+    def count_ancestors(self, bag_type: str) -> int:
+        bag_id = self.ids.get(bag_type)
+        return self.ancestor_counts[bag_id] if bag_id is not None else 0
+
+    def count_nested(self, bag_type: str) -> int:
+        bag_id = self.ids.get(bag_type)
+        return self.nested_counts[bag_id] if bag_id is not None else 0
+
+    def save(self, index_file: str) -> None:
+        colors = sorted(self.ids, key = self.ids.__getitem__)
+        data = {
+            'version': INDEX_VERSION,
+            'source_digest': self.source_digest,
+            'colors': colors,
+            'ancestor_counts': self.ancestor_counts,
+            'nested_counts': self.nested_counts,
+        }
+        # write to a temporary file first so that a crash never leaves a truncated index behind
+        tmp_file = index_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, index_file)
+
+    @staticmethod
+    def load(index_file: str) -> BagRuleIndex:
+        with open(index_file) as f:
+            data = json.load(f)
+
+        if data.get('version') != INDEX_VERSION:
+            raise Exception(f'Unsupported index version: {data.get("version")}')
+
+        return BagRuleIndex(
+            { color: i for i, color in enumerate(data['colors']) },
+            data['ancestor_counts'],
+            data['nested_counts'],
+            data['source_digest'])
+
+def digest_file(input_file: str) -> str:
+    with open(input_file, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def load_or_build_index(input_file: str, index_file: Optional[str] = None) -> BagRuleIndex:
+    '''
+    Loads the index from `index_file` when it was built from the current contents of `input_file`,
+    otherwise parses the rules, builds the index and saves it for the next process.
+    '''
+    source_digest = digest_file(input_file)
+    if index_file is not None and path.isfile(index_file):
+        try:
+            index = BagRuleIndex.load(index_file)
+            if index.source_digest == source_digest:
+                return index
+        except Exception:
+            pass # unreadable or outdated, rebuild it
+
+    index = BagRuleIndex.build(BagGraph.from_rules(parse_rules(input_file)), source_digest)
+    if index_file is not None:
+        index.save(index_file)
+
+    return index
+
 def solve(input_file: str) -> None:
     print(f'[{input_file}]')
     full_path = path.join(path.dirname(__file__), input_file)
@@ -67,7 +274,30 @@ def solve(input_file: str) -> None:
     print('Part 2 answer:', count_sub_bags_of('shiny gold', rule_map))
     print()
 
+def solve_graph(input_file: str) -> None:
+    print(f'[{input_file}] graph')
+    full_path = path.join(path.dirname(__file__), input_file)
+    graph = BagGraph.from_rules(parse_rules(full_path))
+    print('Part 1 answer:', graph.count_ancestors('shiny gold'))
+    print('Part 2 answer:', graph.count_nested('shiny gold'))
+    print()
+
+def solve_index(input_file: str, bag_types: Iterable[str] = ('shiny gold',), index_file: Optional[str] = None) -> None:
+    print(f'[{input_file}] index')
+    full_path = path.join(path.dirname(__file__), input_file)
+    index = load_or_build_index(full_path, path.join(path.dirname(__file__), index_file) if index_file else None)
+    for bag_type in bag_types:
+        print(f'{bag_type}: {index.count_ancestors(bag_type)} containers, {index.count_nested(bag_type)} nested bags')
+    print('Part 1 answer:', index.count_ancestors('shiny gold'))
+    print('Part 2 answer:', index.count_nested('shiny gold'))
+    print()
+
 if __name__ == '__main__':
     solve('example.txt')
     solve('example2.txt')
-    solve('input.txt')
\ No newline at end of file
+    solve('input.txt')
+    solve_graph('example.txt')
+    solve_graph('example2.txt')
+    solve_graph('input.txt')
+    solve_index('example.txt', ['shiny gold', 'dark olive', 'bright white'], 'example.index.json')
+    solve_index('input.txt', index_file = 'input.index.json')
\ No newline at end of file
@@ -1,5 +1,8 @@
+from __future__ import annotations
+from array import array
+from dataclasses import dataclass
 from os import path
-from typing import Optional, cast
+from typing import Callable, Optional, cast
 from enum import Enum
 
 class Operator(Enum):
@@ -59,7 +62,168 @@ def run_until_fixed(insts: list[Instruction]) -> Optional[tuple[int, list[Instru
         acc, hit_loop = run_until_loop(fixed_insts)
         if not hit_loop:
             return acc, fixed_insts
-       
+
+def find_terminating_instructions(insts: list[Instruction]) -> bytearray:
+    '''
+    Marks the instructions from which the program runs off its end, found by walking backwards from the
+    end over the reversed jump graph (every instruction has exactly one successor).
+    '''
+    n = len(insts)
+    jmp = Operator.JMP
+    # the predecessors of each instruction as linked lists threaded through two flat arrays
+    first_pred = array('i', [-1]) * n
+    next_pred = array('i', [-1]) * n
+    pending = list[int]()
+    for pc, (op, value) in enumerate(insts):
+        target = pc + value if op is jmp else pc + 1
+        if target >= n:
+            pending.append(pc)
+        elif target >= 0:
+            next_pred[pc] = first_pred[target]
+            first_pred[target] = pc
+
+    terminating = bytearray(n)
+    while pending:
+        pc = pending.pop()
+        terminating[pc] = 1
+        pred = first_pred[pc]
+        while pred != -1:
+            pending.append(pred)
+            pred = next_pred[pred]
+
+    return terminating
+
+def find_fix(insts: list[Instruction]) -> Optional[tuple[int, int]]:
+    '''
+    Returns the accumulator at the end of the fixed program and the index of the instruction to flip.
+    Only the instructions on the original path can fix the loop, so it's walked once, flipping each
+    `nop`/`jmp` in thought until one of them lands on a terminating instruction.
+    '''
+    terminating = find_terminating_instructions(insts)
+    n = len(insts)
+    acc_op, jmp_op = Operator.ACC, Operator.JMP
+    acc = 0
+    pc = 0
+    visited = bytearray(n)
+    fixed_idx = None
+    while 0 <= pc < n:
+        if visited[pc]:
+            return None
+        visited[pc] = 1
+
+        op, value = insts[pc]
+        if op is acc_op:
+            acc += value
+            pc += 1
+            continue
+
+        if fixed_idx is None:
+            flipped_target = pc + 1 if op is jmp_op else pc + value
+            if flipped_target >= n or (flipped_target >= 0 and terminating[flipped_target]):
+                # from here on the original instructions lead to the end
+                fixed_idx = pc
+                pc = flipped_target
+                continue
+
+        pc = pc + value if op is jmp_op else pc + 1
+
+    return (acc, fixed_idx) if fixed_idx is not None and pc >= n else None
+
+OP_NOP, OP_ACC, OP_JMP = range(3)
+OPCODES = { Operator.NOP: OP_NOP, Operator.ACC: OP_ACC, Operator.JMP: OP_JMP }
+OPERATORS = list(OPCODES) # indexed by opcode
+
+# called with the pc, opcode, argument and accumulator before each instruction executes
+TraceCallback = Callable[[int, int, int, int], None]
+
+@dataclass
+class CompiledProgram:
+    '''
+    A program as parallel arrays of opcodes and arguments. Since every instruction only moves the pc and the
+    accumulator, it's also lowered to the two deltas it applies, so the plain run needs no dispatch at all.
+    '''
+    ops: bytearray
+    args: array
+    acc_deltas: array
+    pc_deltas: array
+
+    @staticmethod
+    def compile(insts: list[Instruction]) -> CompiledProgram:
+        ops = bytearray(OPCODES[op] for op, _ in insts)
+        args = array('q', (value for _, value in insts))
+        acc_deltas = array('q', (value if op == OP_ACC else 0 for op, value in zip(ops, args)))
+        pc_deltas = array('q', (value if op == OP_JMP else 1 for op, value in zip(ops, args)))
+        return CompiledProgram(ops, args, acc_deltas, pc_deltas)
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+def run_compiled(
+    program: CompiledProgram,
+    *,
+    trace: Optional[TraceCallback] = None,
+    op_counts: Optional[list[int]] = None
+) -> tuple[int, bool]:
+    '''
+    Same as `run_until_loop`. Tracing and counting the executed opcodes (indexed by `OP_*`) take a slower loop.
+    '''
+    if trace is not None or op_counts is not None:
+        return run_compiled_instrumented(program, trace, op_counts)
+
+    n = len(program)
+    acc_deltas, pc_deltas = program.acc_deltas, program.pc_deltas
+    visited = bytearray(n)
+    acc = 0
+    pc = 0
+    while 0 <= pc < n:
+        if visited[pc]:
+            return acc, True
+        visited[pc] = 1
+        acc += acc_deltas[pc]
+        pc += pc_deltas[pc]
+
+    if pc < 0:
+        raise Exception(f'Jumped before the start of the program: {pc}')
+
+    return acc, False
+
+def run_compiled_instrumented(
+    program: CompiledProgram,
+    trace: Optional[TraceCallback],
+    op_counts: Optional[list[int]]
+) -> tuple[int, bool]:
+    n = len(program)
+    ops, args = program.ops, program.args
+    visited = bytearray(n)
+    acc = 0
+    pc = 0
+    while 0 <= pc < n:
+        if visited[pc]:
+            return acc, True
+        visited[pc] = 1
+
+        op, value = ops[pc], args[pc]
+        if trace is not None:
+            trace(pc, op, value, acc)
+        if op_counts is not None:
+            op_counts[op] += 1
+
+        if op == OP_ACC:
+            acc += value
+            pc += 1
+        elif op == OP_JMP:
+            pc += value
+        else:
+            pc += 1
+
+    if pc < 0:
+        raise Exception(f'Jumped before the start of the program: {pc}')
+
+    return acc, False
+
+def print_trace(pc: int, op: int, value: int, acc: int) -> None:
+    print(f'{pc:6} {OPERATORS[op].value} {value:+d}  acc = {acc}')
+
 def solve(input_file: str) -> None:
     print(f'[{input_file}]')
     full_path = path.join(path.dirname(__file__), input_file)
@@ -68,6 +232,29 @@ def solve(input_file: str) -> None:
     print('Part 2 answer:', run_until_fixed(insts)[0])
     print()
 
+def solve_v2(input_file: str) -> None:
+    print(f'[{input_file}] v2')
+    full_path = path.join(path.dirname(__file__), input_file)
+    insts = parse_instructions(full_path)
+    print('Part 1 answer:', run_until_loop(insts)[0])
+    print('Part 2 answer:', find_fix(insts)[0])
+    print()
+
+def solve_v3(input_file: str, trace: bool = False) -> None:
+    print(f'[{input_file}] v3')
+    full_path = path.join(path.dirname(__file__), input_file)
+    insts = parse_instructions(full_path)
+    program = CompiledProgram.compile(insts)
+    op_counts = [0] * len(OPCODES)
+    print('Part 1 answer:', run_compiled(program, trace = print_trace if trace else None, op_counts = op_counts)[0])
+    print('Executed', ', '.join(f'{n} {op.value}' for op, n in zip(OPERATORS, op_counts)))
+    print('Part 2 answer:', find_fix(insts)[0])
+    print()
+
 if __name__ == '__main__':
     solve('example.txt')
-    solve('input.txt')
\ No newline at end of file
+    solve('input.txt')
+    solve_v2('example.txt')
+    solve_v2('input.txt')
+    solve_v3('example.txt')
+    solve_v3('input.txt')
\ No newline at end of file
@@ -1,5 +1,6 @@
+from collections import deque
 from os import path
-from typing import Optional
+from typing import Iterable, Optional
 import day01.day1 as day1
 
 def parse_xmas_numbers(input_file: str) -> list[int]:
@@ -16,6 +17,57 @@ def find_invalid_number(xmas_ns: list[int], window_size: int) -> Optional[int]:
         else:
             return num_to_validate
 
+def has_pair_sum(window_counts: dict[int, int], expected_sum: int) -> bool:
+    # the candidate complements are checked against the window in one go (in C)
+    if window_counts.keys().isdisjoint(map(expected_sum.__sub__, window_counts)):
+        return False
+    elif expected_sum % 2 == 0 and window_counts.get(expected_sum // 2) == 1:
+        # the match may have been half of the sum with itself, which needs two copies
+        return any(expected_sum - n in window_counts for n in window_counts if 2 * n != expected_sum)
+    else:
+        return True
+
+def add_to_multiset(multiset: dict[int, int], n: int) -> None:
+    multiset[n] = multiset.get(n, 0) + 1
+
+def remove_from_multiset(multiset: dict[int, int], n: int) -> None:
+    if multiset[n] == 1:
+        del multiset[n]
+    else:
+        multiset[n] -= 1
+
+def find_invalid_number_it(xmas_ns: Iterable[int], window_size: int, *, use_pair_sums: bool = False) -> Optional[int]:
+    '''
+    Iterative version of `find_invalid_number` over a rolling window, updated as numbers enter and leave it.
+    The window is either a count multiset of its numbers (O(window) per number, but the scan runs in C) or
+    a multiset of the sums of all its pairs (O(1) to validate, but O(window) dict updates per number).
+    Even for a window of 5 the former measured faster, so the pair sums are opt-in.
+    '''
+    window = deque[int]()
+    window_counts = dict[int, int]()
+    pair_sums = dict[int, int]()
+    for n in xmas_ns:
+        if len(window) == window_size:
+            is_valid = n in pair_sums if use_pair_sums else has_pair_sum(window_counts, n)
+            if not is_valid:
+                return n
+
+            oldest_n = window.popleft()
+            if use_pair_sums:
+                for other_n in window:
+                    remove_from_multiset(pair_sums, oldest_n + other_n)
+            else:
+                remove_from_multiset(window_counts, oldest_n)
+
+        if use_pair_sums:
+            for other_n in window:
+                add_to_multiset(pair_sums, n + other_n)
+        else:
+            add_to_multiset(window_counts, n)
+        window.append(n)
+
+    return None
+
 def find_contiguous_sum(xmas_ns: list[int], expected_sum: int) -> Optional[list[int]]:
     # stack overflows, no tail recursion in Python!
     # sum_ns = find_contiguous_sum_rec(xmas_ns, [], 0, expected_sum)
@@ -64,7 +116,9 @@ def solve(input_file: str, window_size: int) -> None:
     full_path = path.join(path.dirname(__file__), input_file)
     xmas_ns = parse_xmas_numbers(full_path)
 
-    invalid_n = find_invalid_number(xmas_ns, window_size)
+    # recursion overflows the stack on long inputs
+    # invalid_n = find_invalid_number(xmas_ns, window_size)
+    invalid_n = find_invalid_number_it(xmas_ns, window_size)
     print('Part 1 answer:', invalid_n)
 
     if invalid_n:
@@ -1,20 +1,23 @@
 from __future__ import annotations
 from functools import reduce
 from os import path
-from collections.abc import Iterator
+from collections.abc import Iterable, Iterator
 from typing import Optional, cast
 from math import gcd
 
 def parse_notes(input_file: str) -> tuple[int, list[int | None]]:
     with open(input_file) as f:
         min_departure_ts = int(f.readline())
-        bus_ids = [
-            int(id) if id != 'x' else None 
-            for id 
-            in f.readline().split(',')
-        ]
+        bus_ids = parse_bus_ids(f.readline())
         return min_departure_ts, bus_ids
 
+def parse_bus_ids(schedule_line: str) -> list[int | None]:
+    return [
+        int(id) if id != 'x' else None 
+        for id 
+        in schedule_line.strip().split(',')
+    ]
+
 def calc_waiting_time(min_departure_ts: int, bus_freq: int) -> int:
     last_departure = min_departure_ts % bus_freq
     if last_departure == 0:
@@ -134,6 +137,49 @@ def get_earliest_sequence_departure(bus_ids: list[int | None]) -> Optional[int]:
         # else:
             # print('Restarting at time', t, 'after going through all the buses')
 
+def merge_congruences(t1: int, n1: int, t2: int, n2: int) -> Optional[tuple[int, int]]:
+    '''
+    Combines t ≡ t1 (mod n1) and t ≡ t2 (mod n2) into a single t ≡ t' (mod lcm(n1, n2)).
+    The moduli don't need to be coprime, but then the congruences may not be compatible (returns None).
+    '''
+    g = gcd(n1, n2)
+    if (t2 - t1) % g != 0:
+        return None
+
+    # t = t1 + n1 * k, so we need n1 * k ≡ t2 - t1 (mod n2), dividing everything by g makes n1 invertible
+    n2_g = n2 // g
+    k = (t2 - t1) // g * pow(n1 // g, -1, n2_g) % n2_g
+    lcm = n1 // g * n2
+    return (t1 + n1 * k) % lcm, lcm
+
+def get_earliest_sequence_departure_crt(bus_ids: list[int | None]) -> Optional[int]:
+    '''
+    Each bus gives a congruence t + idx ≡ 0 (mod bus_id), i.e. t ≡ -idx (mod bus_id). Folding them one at a time
+    (Chinese Remainder Theorem) keeps a single congruence for all the buses so far, so it takes one modular
+    inverse per bus instead of stepping through multiples.
+    '''
+    t, period = 0, 1
+    for idx, bus_id in enumerate(bus_ids):
+        if bus_id is None:
+            continue
+
+        merged = merge_congruences(t, period, -idx % bus_id, bus_id)
+        if merged is None:
+            return None
+
+        t, period = merged
+
+    # t = 0 only works if the buses all leave together at the start, the earliest departure after it is a period later
+    return t if t > 0 else period
+
+def solve_schedules(schedule_lines: Iterable[str]) -> list[Optional[int]]:
+    return [
+        get_earliest_sequence_departure_crt(parse_bus_ids(line))
+        for line
+        in schedule_lines
+        if line.strip() != ''
+    ]
+
 def solve(input_file: str) -> None:
     print(f'[{input_file}]')
     full_path = path.join(path.dirname(__file__), input_file)
@@ -142,7 +188,7 @@ def solve(input_file: str) -> None:
     bus_id, waiting_time = get_earliest_bus(min_departure_ts, get_active_bus_ids(bus_ids))
     print('Part 1 answer:', bus_id * waiting_time)
 
-    earliest_t = get_earliest_sequence_departure(bus_ids)
+    earliest_t = get_earliest_sequence_departure_crt(bus_ids)
     if earliest_t:
         print('Part 2 answer:', earliest_t)
 
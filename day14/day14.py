@@ -1,5 +1,7 @@
 from __future__ import annotations
 from abc import ABC
+from dataclasses import dataclass
+from functools import lru_cache
 from os import path
 from typing import Iterator
 import re
@@ -13,6 +15,7 @@ class UpdateMask(Instruction):
         self.raw_mask = mask_str
         self.and_mask = self._parse_zero_mask(mask_str)
         self.or_mask = self._parse_one_mask(mask_str)
+        self.floating_mask = self._parse_floating_mask(mask_str)
 
     @staticmethod
     def _parse_zero_mask(mask_str: str) -> int:
@@ -22,6 +25,10 @@ class UpdateMask(Instruction):
     def _parse_one_mask(mask_str: str) -> int:
         return int(mask_str.replace('X', '0'), 2)
 
+    @staticmethod
+    def _parse_floating_mask(mask_str: str) -> int:
+        return int(mask_str.replace('1', '0').replace('X', '1'), 2)
+
 class UpdateMemory(Instruction):
     def __init__(self, mem_pos: int, value: int):
         self.mem_pos = mem_pos
@@ -122,12 +129,215 @@ def initialize_memory_v2(insts: list[Instruction]) -> dict[int, int]:
 
     return memory
 
-def optimize_instructions(insts: list[Instruction], *, within_masks_only: bool) -> list[Instruction]:
+# A set of addresses: the bits set in the second int can take any value (floating), the others
+# are fixed to the value in the first int (which is always 0 at the floating bits)
+AddressPattern = tuple[int, int]
+
+def initialize_memory_v3(insts: list[Instruction]) -> list[tuple[AddressPattern, int]]:
+    '''
+    Same as v2, but keeps each write as the pattern of addresses it covers instead of expanding its floating
+    bits. Overlaps are only resolved when summing, by `sum_memory_v3`, as later writes shadow earlier ones.
+    '''
+    memory = list[tuple[AddressPattern, int]]()
+    or_mask = 0
+    floating_mask = 0
+
+    for inst in insts:
+        if isinstance(inst, UpdateMask):
+            or_mask = inst.or_mask
+            floating_mask = inst.floating_mask
+        elif isinstance(inst, UpdateMemory):
+            memory.append((((inst.mem_pos | or_mask) & ~floating_mask, floating_mask), inst.value))
+        else:
+            raise NotImplementedError('Unknown instruction type: ' + inst.__class__.__name__)
+
+    return memory
+
+ADDRESS_BITS = 36
+
+@dataclass
+class PatternIndex:
+    '''
+    The distinct patterns of a memory from the latest write to the first, so that pattern `i` is bit `i`
+    of a bitset and the lowest bit set is always the latest write. For each address bit it keeps the
+    bitset of the patterns fixing it, to 0 and to 1, to narrow down a set of patterns with a few bitwise ops.
+    '''
+    patterns: list[AddressPattern]
+    values: list[int]
+    fixed: list[int]
+    fixed_to_zero: list[int]
+    fixed_to_one: list[int]
+
+    @staticmethod
+    def build(memory: list[tuple[AddressPattern, int]]) -> PatternIndex:
+        patterns = list[AddressPattern]()
+        values = list[int]()
+        seen = set[AddressPattern]()
+        for pattern, value in reversed(memory):
+            if pattern not in seen:
+                seen.add(pattern)
+                patterns.append(pattern)
+                values.append(value)
+
+        fixed_to_zero = [0] * ADDRESS_BITS
+        fixed_to_one = [0] * ADDRESS_BITS
+        for idx, (fixed, floating) in enumerate(patterns):
+            for bit in range(ADDRESS_BITS):
+                if not floating >> bit & 1:
+                    if fixed >> bit & 1:
+                        fixed_to_one[bit] |= 1 << idx
+                    else:
+                        fixed_to_zero[bit] |= 1 << idx
+
+        fixed = [zeros | ones for zeros, ones in zip(fixed_to_zero, fixed_to_one)]
+        return PatternIndex(patterns, values, fixed, fixed_to_zero, fixed_to_one)
+
+def sum_memory_v3(memory: list[tuple[AddressPattern, int]], *, leaf_bits: int = 14) -> int:
+    '''
+    Each address holds the value of the latest write covering it. We decide the address bits one at a time,
+    keeping only the patterns that can still cover the addresses left, and cut the search as soon as one of
+    them covers all of those addresses, since it shadows every write before it. Once at most `leaf_bits` bits
+    are still looked at by some pattern, the addresses left are enumerated as a bitmap instead.
+    The search is bounded by 2^(36 - leaf_bits) bitmaps, each scanning the patterns once, and only holds the
+    current path of bits and one bitmap of 2^leaf_bits bits in memory. That bound is far from reached when
+    masks have few Xs, as in the puzzle, but it's still superlinear in the number of writes: with around 30 Xs
+    per mask, a few hundred writes take minutes.
+    '''
+    index = PatternIndex.build(memory)
+    return sum_addresses(index, (1 << len(index.patterns)) - 1, list(range(ADDRESS_BITS)), leaf_bits)
+
+def sum_addresses(index: PatternIndex, active: int, undecided: list[int], leaf_bits: int) -> int:
+    '''
+    Sums the values held by the addresses left after deciding all but the `undecided` bits, given that only
+    the patterns in the `active` bitset can cover them.
+    '''
+    while True:
+        if not active:
+            return 0
+
+        constrained = [bit for bit in undecided if active & index.fixed[bit]]
+        fixing_any = 0
+        for bit in constrained:
+            fixing_any |= index.fixed[bit]
+
+        # a pattern fixing none of the undecided bits covers all the addresses left, so the earlier ones are shadowed
+        covering = active & ~fixing_any
+        if not covering:
+            break
+
+        latest_covering = covering & -covering
+        if active == latest_covering:
+            return index.values[latest_covering.bit_length() - 1] << len(undecided)
+
+        narrowed = active & ((latest_covering << 1) - 1)
+        if narrowed == active:
+            break
+        # dropping patterns may leave some bits unconstrained, so check again
+        active = narrowed
+
+    # bits no pattern looks at just multiply the sum
+    n_free = len(undecided) - len(constrained)
+    if len(constrained) <= leaf_bits:
+        return sum_addresses_bitmap(index, active, constrained) << n_free
+
+    # split on a bit fixed by the latest pattern, so that it soon covers the addresses left on one side and is
+    # gone on the other, picking the one fixed by most patterns so that both sides drop as many as possible
+    latest = (active & -active).bit_length() - 1
+    split_bit = max(
+        (bit for bit in constrained if index.fixed[bit] >> latest & 1),
+        key = lambda bit: (active & index.fixed[bit]).bit_count())
+    rest = [bit for bit in constrained if bit != split_bit]
+    return (
+        sum_addresses(index, active & ~index.fixed_to_one[split_bit], rest, leaf_bits) +
+        sum_addresses(index, active & ~index.fixed_to_zero[split_bit], rest, leaf_bits)
+    ) << n_free
+
+def sum_addresses_bitmap(index: PatternIndex, active: int, bits: list[int]) -> int:
+    '''
+    Same as `sum_addresses` when every undecided bit is in `bits`, keeping the addresses covered so far
+    as a bitmap with one bit per assignment of `bits`.
+    '''
+    all_addresses, bit_masks = get_bitmap_masks(len(bits))
+    n_addresses = all_addresses.bit_count()
+    covered = 0
+    n_covered = 0
+    total = 0
+    while active:
+        latest = active & -active
+        active ^= latest
+        idx = latest.bit_length() - 1
+
+        fixed, floating = index.patterns[idx]
+        addresses = all_addresses
+        for pos, bit in enumerate(bits):
+            if not floating >> bit & 1:
+                addresses &= bit_masks[pos][fixed >> bit & 1]
+
+        covered |= addresses
+        count = covered.bit_count()
+        if count != n_covered:
+            total += index.values[idx] * (count - n_covered)
+            n_covered = count
+            if n_covered == n_addresses:
+                break
+
+    return total
+
+@lru_cache(maxsize = None)
+def get_bitmap_masks(n_bits: int) -> tuple[int, list[tuple[int, int]]]:
+    '''
+    Returns the bitmap of all the 2^`n_bits` assignments of `n_bits` bits and, for each bit position,
+    the bitmaps of the assignments where it's 0 and where it's 1.
+    '''
+    size = 1 << n_bits
+    all_addresses = (1 << size) - 1
+    bit_masks = list[tuple[int, int]]()
+    for pos in range(n_bits):
+        # runs of 2^pos zeros and 2^pos ones, doubled until they fill the bitmap
+        run = 1 << pos
+        ones = ((1 << run) - 1) << run
+        length = 2 * run
+        while length < size:
+            ones |= ones << length
+            length *= 2
+        bit_masks.append((all_addresses ^ ones, ones))
+
+    return all_addresses, bit_masks
+
+def optimize_instructions(insts: list[Instruction], *, within_masks_only: bool) -> tuple[list[Instruction], int]:
     '''
     Eliminates repeated writes to the same memory location, preserving the last one.
     If `within_masks_only` is True, preserves the last one for each mask.
+    Returns the optimized instructions and how many writes were eliminated.
     '''
-    return optimize_instructions_rec(insts, within_masks_only, set())
+    # the recursive version hits the recursion limit on long programs
+    # return optimize_instructions_rec(insts, within_masks_only, set())
+    return optimize_instructions_it(insts, within_masks_only)
+
+def optimize_instructions_it(insts: list[Instruction], within_masks_only: bool) -> tuple[list[Instruction], int]:
+    optimized = list[Instruction]()
+    written_mem_pos = set[int]()
+    n_eliminated = 0
+
+    # scan backwards, so the first write we see to each location is the one that sticks
+    for inst in reversed(insts):
+        if isinstance(inst, UpdateMask):
+            if within_masks_only:
+                written_mem_pos.clear()
+            optimized.append(inst)
+
+        elif isinstance(inst, UpdateMemory):
+            if inst.mem_pos in written_mem_pos:
+                n_eliminated += 1
+            else:
+                written_mem_pos.add(inst.mem_pos)
+                optimized.append(inst)
+
+        else:
+            raise NotImplementedError('Unknown instruction type: ' + inst.__class__.__name__)
+
+    optimized.reverse()
+    return optimized, n_eliminated
 
 def optimize_instructions_rec(insts: list[Instruction], within_masks_only: bool, written_mem_pos: set[int]) -> list[Instruction]:
     if insts == []:
@@ -154,6 +364,22 @@ def optimize_instructions_rec(insts: list[Instruction], within_masks_only: bool,
         else:
             raise NotImplementedError('Unknown instruction type: ' + last.__class__.__name__)
 
+def part1(insts: list[Instruction], *, optimize: bool = True) -> tuple[int, int]:
+    '''
+    Returns the answer and how many writes were eliminated by the optimization.
+    '''
+    insts, n_eliminated = optimize_instructions(insts, within_masks_only = False) if optimize else (insts, 0)
+    memory = initialize_memory(insts)
+    return sum(memory.values()), n_eliminated
+
+def part2(insts: list[Instruction], *, optimize: bool = True) -> tuple[int, int]:
+    '''
+    Returns the answer and how many writes were eliminated by the optimization.
+    '''
+    insts, n_eliminated = optimize_instructions(insts, within_masks_only = True) if optimize else (insts, 0)
+    memory = initialize_memory_v3(insts)
+    return sum_memory_v3(memory), n_eliminated
+
 def solve(input_file: str, *, optimize = True, skip_part2 = False) -> None:
     print(f'[{input_file}]')
     full_path = path.join(path.dirname(__file__), input_file)
@@ -161,19 +387,23 @@ def solve(input_file: str, *, optimize = True, skip_part2 = False) -> None:
     insts = parse_instructions(full_path)
 
     start_p1 = time.time_ns()
-    insts_p1 = optimize_instructions(insts, within_masks_only = False) if optimize else insts
-    memory = initialize_memory(insts_p1)
-    print('Part 1 answer:', sum(memory.values()), '(took', time.time_ns() - start_p1, 'ns)')
+    obtained_p1, n_eliminated = part1(insts, optimize = optimize)
+    time_p1 = time.time_ns() - start_p1
+    if optimize:
+        print('Eliminated', n_eliminated, 'writes for part 1')
+    print('Part 1 answer:', obtained_p1, '(took', time_p1, 'ns)')
 
     if not skip_part2:
         start_p2 = time.time_ns()
-        insts_p2 = optimize_instructions(insts, within_masks_only = True) if optimize else insts
-        memory_v2 = initialize_memory_v2(insts_p2)
-        print('Part 2 answer:', sum(memory_v2.values()), '(took', time.time_ns() - start_p2, 'ns)')
+        obtained_p2, n_eliminated = part2(insts, optimize = optimize)
+        time_p2 = time.time_ns() - start_p2
+        if optimize:
+            print('Eliminated', n_eliminated, 'writes for part 2')
+        print('Part 2 answer:', obtained_p2, '(took', time_p2, 'ns)')
     
     print()
 
 if __name__ == '__main__':
-    solve('example.txt', skip_part2 = True) # too slow on part2
+    solve('example.txt')
     solve('example2.txt')
-    solve('input.txt', optimize = False)
\ No newline at end of file
+    solve('input.txt')
\ No newline at end of file
@@ -1,5 +1,13 @@
-from itertools import islice
+from __future__ import annotations
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
+from os import path
 from typing import Iterator, Optional
+import multiprocessing
+import os
+import struct
 import time
     
 def play_game(starting_nums: list[int]) -> Iterator[int]:
@@ -32,29 +40,190 @@ def play_game(starting_nums: list[int]) -> Iterator[int]:
         last_spoken_num = next_num
         prev_turn += 1
 
+@dataclass
+class GameState:
+    starting_nums: list[int]
+    turn: int # 1-based turn in which `last_num` was spoken
+    last_num: int
+    last_spoken_in_turn: array # 1-based turn in which each number was last spoken before `turn`, or 0 if never
+
+    @staticmethod
+    def start(starting_nums: list[int], n: int) -> GameState:
+        last_spoken_in_turn = array('I', [0]) * max(n, max(starting_nums) + 1)
+        *first_nums, last_num = starting_nums
+        for turn, num in enumerate(first_nums, start = 1):
+            last_spoken_in_turn[num] = turn
+
+        return GameState(list(starting_nums), len(starting_nums), last_num, last_spoken_in_turn)
+
+    def ensure_capacity(self, n: int) -> None:
+        # every number spoken after the start is a turn difference, so below `n`
+        missing = n - len(self.last_spoken_in_turn)
+        if missing > 0:
+            self.last_spoken_in_turn.extend(array('I', [0]) * missing)
+
+CHECKPOINT_MAGIC = b'D15C'
+CHECKPOINT_HEADER = struct.Struct('<4sQQQ')
+
+def save_checkpoint(checkpoint_file: str, state: GameState) -> None:
+    # write next to the target and rename, so that an interruption never leaves a truncated checkpoint
+    tmp_file = checkpoint_file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(CHECKPOINT_HEADER.pack(CHECKPOINT_MAGIC, state.turn, state.last_num, len(state.starting_nums)))
+        array('Q', state.starting_nums).tofile(f)
+        state.last_spoken_in_turn.tofile(f)
+    os.replace(tmp_file, checkpoint_file)
+
+def load_checkpoint(checkpoint_file: str) -> Optional[GameState]:
+    if not path.isfile(checkpoint_file):
+        return None
+
+    with open(checkpoint_file, 'rb') as f:
+        magic, turn, last_num, n_starting_nums = CHECKPOINT_HEADER.unpack(f.read(CHECKPOINT_HEADER.size))
+        if magic != CHECKPOINT_MAGIC:
+            raise Exception('Not a day 15 checkpoint: ' + checkpoint_file)
+
+        starting_nums = array('Q')
+        starting_nums.fromfile(f, n_starting_nums)
+        table_size = (path.getsize(checkpoint_file) - f.tell()) // 4
+        last_spoken_in_turn = array('I')
+        last_spoken_in_turn.fromfile(f, table_size)
+
+    return GameState(starting_nums.tolist(), turn, last_num, last_spoken_in_turn)
+
+def play_turns(last_spoken_in_turn: array, last_num: int, from_turn: int, to_turn: int) -> int:
+    for turn in range(from_turn, to_turn):
+        spoken_in_turn = last_spoken_in_turn[last_num]
+        last_spoken_in_turn[last_num] = turn
+        last_num = turn - spoken_in_turn if spoken_in_turn else 0
+
+    return last_num
+
+# turns played between checks of the clock when checkpointing
+CHECKPOINT_CHUNK_TURNS = 1000000
+
+def play_game_nth(starting_nums: list[int], n: int, *, checkpoint_file: Optional[str] = None, checkpoint_seconds: float = 300.0) -> int:
+    '''
+    Same rules as `play_game`, but only returns the `n`th spoken number. The turns are kept in a flat
+    array indexed by number, so memory stays at 4 bytes per possible number.
+    If `checkpoint_file` is given, the game resumes from it when it holds an earlier turn of the same
+    game (e.g. a previous run to a smaller `n`) and is saved about every `checkpoint_seconds`. A checkpoint
+    of another game or of a later turn is left untouched, and the game is then played without saving.
+    '''
+    if n <= len(starting_nums):
+        return starting_nums[n - 1]
+
+    state = load_checkpoint(checkpoint_file) if checkpoint_file else None
+    if state is None or state.starting_nums != list(starting_nums) or state.turn > n:
+        if state is not None:
+            # don't overwrite a checkpoint that can't be resumed from here, it may be of a longer run
+            checkpoint_file = None
+        state = GameState.start(starting_nums, n)
+    else:
+        state.ensure_capacity(n)
+
+    if not checkpoint_file:
+        state.last_num = play_turns(state.last_spoken_in_turn, state.last_num, state.turn, n)
+        return state.last_num
+
+    # each save writes the whole table, so wait at least 10 times as long as the last one took to keep
+    # saving a small fraction of the run even when the table is many GB
+    save_interval_ns = int(checkpoint_seconds * 1e9)
+    last_save = time.perf_counter_ns()
+    while state.turn < n:
+        next_turn = min(state.turn + CHECKPOINT_CHUNK_TURNS, n)
+        state.last_num = play_turns(state.last_spoken_in_turn, state.last_num, state.turn, next_turn)
+        state.turn = next_turn
+
+        now = time.perf_counter_ns()
+        if now - last_save >= save_interval_ns or state.turn == n:
+            save_checkpoint(checkpoint_file, state)
+            last_save = time.perf_counter_ns()
+            save_interval_ns = max(save_interval_ns, 10 * (last_save - now))
+
+    return state.last_num
+
+def play_game_nth_job(starting_nums: list[int], n: int, checkpoint_dir: Optional[str]) -> int:
+    checkpoint_file = None
+    if checkpoint_dir:
+        checkpoint_file = path.join(checkpoint_dir, '-'.join(map(str, starting_nums)) + '.ckpt')
+    return play_game_nth(starting_nums, n, checkpoint_file = checkpoint_file)
+
+def play_games_nth(starting_seqs: list[list[int]], n: int, *, max_workers: Optional[int] = None, checkpoint_dir: Optional[str] = None) -> list[int]:
+    '''
+    Evaluates `play_game_nth` for many starting sequences across a process pool, each worker holding the
+    state of one game at a time. With `checkpoint_dir`, each game checkpoints to its own file there.
+    By default there's a worker per core, unless this is already a worker of another pool (e.g. of
+    `run_all.py`), in which case the games are played one after the other in this process.
+    '''
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok = True)
+
+    if max_workers is None and multiprocessing.parent_process() is not None:
+        max_workers = 1
+
+    if max_workers == 1:
+        return [play_game_nth_job(starting_nums, n, checkpoint_dir) for starting_nums in starting_seqs]
+
+    with ProcessPoolExecutor(max_workers = max_workers) as executor:
+        return list(executor.map(play_game_nth_job, starting_seqs, repeat(n), repeat(checkpoint_dir)))
+
+def part1(starting_nums: list[int]) -> int:
+    return play_game_nth(starting_nums, 2020)
+
+def part2(starting_nums: list[int]) -> int:
+    return play_game_nth(starting_nums, 30000000)
+
 def solve(starting_nums: list[int], *, expected: tuple[Optional[int], Optional[int]] = (None, None)) -> None:
     print(starting_nums)
 
     start_p1 = time.time_ns()
-    *turns, last_turn = islice(play_game(starting_nums), 2020)
+    last_turn = part1(starting_nums)
     print('Part 1 answer:', last_turn, '(took', time.time_ns() - start_p1, 'ns)')
     if expected[0] is not None and last_turn != expected[0]:
         print('Expected: ', expected[0])
 
     start_p2 = time.time_ns()
-    *turns, last_turn = islice(play_game(starting_nums), 30000000)
+    last_turn = part2(starting_nums)
     print('Part 2 answer:', last_turn, '(took', time.time_ns() - start_p2, 'ns)')
     if expected[1] is not None and last_turn != expected[1]:
         print('Expected: ', expected[1])
 
     print()
 
+def solve_batch(games: list[tuple[list[int], tuple[Optional[int], Optional[int]]]], *, max_workers: Optional[int] = None, checkpoint_dir: Optional[str] = None) -> None:
+    starting_seqs = [starting_nums for starting_nums, _ in games]
+
+    start_p1 = time.time_ns()
+    last_turns_p1 = play_games_nth(starting_seqs, 2020, max_workers = max_workers)
+    time_p1 = time.time_ns() - start_p1
+
+    start_p2 = time.time_ns()
+    last_turns_p2 = play_games_nth(starting_seqs, 30000000, max_workers = max_workers, checkpoint_dir = checkpoint_dir)
+    time_p2 = time.time_ns() - start_p2
+
+    for (starting_nums, expected), last_turn_p1, last_turn_p2 in zip(games, last_turns_p1, last_turns_p2):
+        print(starting_nums)
+        print('Part 1 answer:', last_turn_p1)
+        if expected[0] is not None and last_turn_p1 != expected[0]:
+            print('Expected: ', expected[0])
+
+        print('Part 2 answer:', last_turn_p2)
+        if expected[1] is not None and last_turn_p2 != expected[1]:
+            print('Expected: ', expected[1])
+
+        print()
+
+    print('Part 1 took', time_p1, 'ns and Part 2 took', time_p2, 'ns for all', len(games), 'games')
+
 if __name__ == '__main__':
-    solve([0, 3, 6], expected = (436, 175594))
-    solve([1, 3, 2], expected = (1, 2578))
-    solve([2, 1, 3], expected = (10, 3544142))
-    solve([1, 2, 3], expected = (27, 261214))
-    solve([2, 3, 1], expected = (78, 6895259))
-    solve([3, 2, 1], expected = (438, 18))
-    solve([3, 1, 2], expected = (1836, 362))
-    solve([1, 0, 16, 5, 17, 4], expected = (1294, None))
\ No newline at end of file
+    solve_batch([
+        ([0, 3, 6], (436, 175594)),
+        ([1, 3, 2], (1, 2578)),
+        ([2, 1, 3], (10, 3544142)),
+        ([1, 2, 3], (27, 261214)),
+        ([2, 3, 1], (78, 6895259)),
+        ([3, 2, 1], (438, 18)),
+        ([3, 1, 2], (1836, 362)),
+        ([1, 0, 16, 5, 17, 4], (1294, None)),
+    ])
\ No newline at end of file
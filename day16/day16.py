@@ -90,15 +90,25 @@ def get_fields_in_ticket_order(fields: list[Field], tickets: list[Ticket]) -> li
     # finally sort the fields by the found positions
     return sorted(fields, key = lambda f: final_positions[f])
 
+def part1(notes: tuple[list[Field], Ticket, list[Ticket]]) -> int:
+    fields, _, nearby_tickets = notes
+    return scanning_error_rate(fields, nearby_tickets)
+
+def part2(notes: tuple[list[Field], Ticket, list[Ticket]]) -> int:
+    fields, my_ticket, nearby_tickets = notes
+    ordered_fields = get_fields_in_ticket_order(fields, [my_ticket] + nearby_tickets)
+    departure_values = (v for f, v in zip(ordered_fields, my_ticket) if f.name.startswith('departure'))
+    return reduce(lambda acc, v: acc * v, departure_values, 1)
+
 def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (None, None)) -> None:
     print(f'[{input_file}]')
     full_path = path.join(path.dirname(__file__), input_file)
 
-    fields, my_ticket, nearby_tickets = parse_notes(full_path)
+    notes = parse_notes(full_path)
 
     # Part 1
     start_p1 = time.time_ns()
-    obtained_p1 = scanning_error_rate(fields, nearby_tickets)
+    obtained_p1 = part1(notes)
     
     print('Part 1 answer:', obtained_p1, '(took', time.time_ns() - start_p1, 'ns)')
     if expected[0] is not None and expected[0] != obtained_p1:
@@ -106,11 +116,7 @@ def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (N
 
     # Part 2
     start_p2 = time.time_ns()
-    ordered_fields = get_fields_in_ticket_order(fields, [my_ticket] + nearby_tickets)
-    print('Ordered fields:', [str(f) for f in ordered_fields])
-
-    departure_values = (v for f, v in zip(ordered_fields, my_ticket) if f.name.startswith('departure'))
-    obtained_p2 = reduce(lambda acc, v: acc * v, departure_values, 1)
+    obtained_p2 = part2(notes)
 
     print('Part 2 answer:', obtained_p2, '(took', time.time_ns() - start_p2, 'ns)')
     if expected[1] is not None and expected[1] != obtained_p2:
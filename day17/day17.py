@@ -112,6 +112,14 @@ def simulate_cycle(dim: PocketDimension, use_4d: bool) -> PocketDimension:
     new_dim = PocketDimension(new_active_cubes, new_origin, new_dest)
     return new_dim
 
+def part1(pocket_dimension: PocketDimension) -> int:
+    final_dim = reduce(lambda dim, _: simulate_cycle(dim, use_4d = False), range(6), pocket_dimension)
+    return len(final_dim.active_cubes)
+
+def part2(pocket_dimension: PocketDimension) -> int:
+    final_dim = reduce(lambda dim, _: simulate_cycle(dim, use_4d = True), range(6), pocket_dimension)
+    return len(final_dim.active_cubes)
+
 def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (None, None)) -> None:
     print(f'[{input_file}]')
     full_path = path.join(path.dirname(__file__), input_file)
@@ -121,8 +129,7 @@ def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (N
     # Part 1
     start_p1 = time.time_ns()
     # print(pocket_dimension)
-    final_dim_p1 = reduce(lambda dim, _: simulate_cycle(dim, use_4d = False), range(6), pocket_dimension)
-    obtained_p1 = len(final_dim_p1.active_cubes)
+    obtained_p1 = part1(pocket_dimension)
 
     print('Part 1 answer:', obtained_p1, '(took', time.time_ns() - start_p1, 'ns)')
     if expected[0] is not None and expected[0] != obtained_p1:
@@ -130,8 +137,7 @@ def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (N
 
     # Part 2
     start_p2 = time.time_ns()
-    final_dim_p2 = reduce(lambda dim, _: simulate_cycle(dim, use_4d = True), range(6), pocket_dimension)
-    obtained_p2 = len(final_dim_p2.active_cubes)
+    obtained_p2 = part2(pocket_dimension)
 
     print('Part 2 answer:', obtained_p2, '(took', time.time_ns() - start_p2, 'ns)')
     if expected[1] is not None and expected[1] != obtained_p2:
@@ -96,6 +96,12 @@ def evaluate_rec_v2(tokens: list[str], num_parens: int = 0, acc_value: Optional[
     else:
         raise NotImplementedError()
 
+def part1(exprs: list[str]) -> int:
+    return sum(map(evaluate, exprs))
+
+def part2(exprs: list[str]) -> int:
+    return sum(map(evaluate_p2, exprs))
+
 def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (None, None)) -> None:
     print(f'[{input_file}]')
     full_path = path.join(path.dirname(__file__), input_file)
@@ -107,7 +113,7 @@ def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (N
     # for e in exprs:
     #     print(e, '=', evaluate(e))
 
-    obtained_p1 = sum(map(evaluate, exprs))
+    obtained_p1 = part1(exprs)
 
     print('Part 1 answer:', obtained_p1, '(took', time.time_ns() - start_p1, 'ns)')
     if expected[0] is not None and expected[0] != obtained_p1:
@@ -118,7 +124,7 @@ def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (N
     # for e in exprs:
     #     print(e, '=', evaluate_p2(e))
 
-    obtained_p2 = sum(map(evaluate_p2, exprs))
+    obtained_p2 = part2(exprs)
 
     print('Part 2 answer:', obtained_p2, '(took', time.time_ns() - start_p2, 'ns)')
     if expected[1] is not None and expected[1] != obtained_p2:
@@ -65,6 +65,17 @@ def match_rule(input: str, rule: Parser) -> bool:
     remaining_input = next(rule(input), None)
     return remaining_input == '' 
 
+def part1(rules: dict[int, Parser], messages: list[str]) -> int:
+    return sum(1 for msg in messages if match_rule(msg, rules[0]))
+
+def part2(rules: dict[int, Parser], messages: list[str]) -> int:
+    '''
+    Replaces rules 8 and 11 in `rules` with their looping versions before matching.
+    '''
+    rules[8] = parse_rule('8: 42 | 42 8', rules)[1]
+    rules[11] = parse_rule('11: 42 31 | 42 11 31', rules)[1]
+    return sum(1 for msg in messages if match_rule(msg, rules[0]))
+
 def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (None, None)) -> None:
     print(f'[{input_file}]')
     full_path = path.join(path.dirname(__file__), input_file)
@@ -73,7 +84,7 @@ def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (N
 
     # Part 1
     start_p1 = time.time_ns()
-    obtained_p1 = sum(1 for msg in messages if match_rule(msg, rules[0]))
+    obtained_p1 = part1(rules, messages)
 
     print('Part 1 answer:', obtained_p1, '(took', time.time_ns() - start_p1, 'ns)')
     if expected[0] is not None and expected[0] != obtained_p1:
@@ -81,9 +92,7 @@ def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (N
 
     # Part 2
     start_p2 = time.time_ns()
-    rules[8] = parse_rule('8: 42 | 42 8', rules)[1]
-    rules[11] = parse_rule('11: 42 31 | 42 11 31', rules)[1]
-    obtained_p2 = sum(1 for msg in messages if match_rule(msg, rules[0]))
+    obtained_p2 = part2(rules, messages)
 
     print('Part 2 answer:', obtained_p2, '(took', time.time_ns() - start_p2, 'ns)')
     if expected[1] is not None and expected[1] != obtained_p2:
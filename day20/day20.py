@@ -67,6 +67,12 @@ def match_tiles(tiles: list[Tile]) -> dict[Tile, list[Tile]]:
 def get_corner_tiles(tile_matches: dict[Tile, list[Tile]]) -> list[Tile]:
     return [t for t in tile_matches if len(tile_matches[t]) == 2]
 
+def part1(tiles: list[Tile]) -> int:
+    tile_matches = match_tiles(tiles)
+    corner_tiles = get_corner_tiles(tile_matches)
+    assert len(corner_tiles) == 4
+    return reduce(lambda acc, t: acc * t.id, corner_tiles, 1)
+
 def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (None, None)) -> None:
     print(f'[{input_file}]')
     full_path = path.join(path.dirname(__file__), input_file)
@@ -78,11 +84,8 @@ def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (N
 
     # Part 1
     start_p1 = time.time_ns()
-    tile_matches = match_tiles(tiles)
-    corner_tiles = get_corner_tiles(tile_matches)
-    assert len(corner_tiles) == 4
+    obtained_p1 = part1(tiles)
     time_p1 = (time.time_ns() - start_p1) + time_common
-    obtained_p1 = reduce(lambda acc, t: acc * t.id, corner_tiles, 1)
 
     print('Part 1 answer:', obtained_p1, '(took', time_p1, 'ns)')
     if expected[0] is not None and expected[0] != obtained_p1:
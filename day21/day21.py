@@ -63,6 +63,19 @@ def map_allergens_to_ingredients(foods: list[Food]) -> dict[str, set[str]]:
 
     return allergen_to_ingredient
 
+def part1(foods: list[Food], allergen_map: Optional[dict[str, set[str]]] = None) -> int:
+    if allergen_map is None:
+        allergen_map = map_allergens_to_ingredients(foods)
+
+    ingredients_with_allergens = set(chain(*allergen_map.values()))
+    return sum(len(f.ingredients - ingredients_with_allergens) for f in foods)
+
+def part2(foods: list[Food], allergen_map: Optional[dict[str, set[str]]] = None) -> str:
+    if allergen_map is None:
+        allergen_map = map_allergens_to_ingredients(foods)
+
+    return ','.join(list(allergen_map[allergen])[0] for allergen in sorted(allergen_map.keys()))
+
 def solve(input_file: str, *, expected: tuple[Optional[int], Optional[str]] = (None, None)) -> None:
     print(f'[{input_file}]')
     full_path = path.join(path.dirname(__file__), input_file)
@@ -76,8 +89,7 @@ def solve(input_file: str, *, expected: tuple[Optional[int], Optional[str]] = (N
 
     # Part 1
     start_p1 = time.time_ns()
-    ingredients_with_allergens = set(chain(*allergen_map.values()))
-    obtained_p1 = sum(len(f.ingredients - ingredients_with_allergens) for f in foods)
+    obtained_p1 = part1(foods, allergen_map)
     time_p1 = (time.time_ns() - start_p1) + time_common
 
     print('Part 1 answer:', obtained_p1, '(took', time_p1, 'ns)')
@@ -86,7 +98,7 @@ def solve(input_file: str, *, expected: tuple[Optional[int], Optional[str]] = (N
 
     # Part 2
     start_p2 = time.time_ns()
-    obtained_p2 = ','.join(list(allergen_map[allergen])[0] for allergen in sorted(allergen_map.keys()))
+    obtained_p2 = part2(foods, allergen_map)
     time_p2 = (time.time_ns() - start_p2) + time_common
 
     print('Part 2 answer:', obtained_p2, '(took', time_p2, 'ns)')
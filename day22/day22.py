@@ -70,6 +70,14 @@ def get_score(deck: Deck) -> int:
         in enumerate(deck[::-1])
     )
     
+def part1(decks: list[Deck]) -> int:
+    _, winner_deck = play_combat(decks)
+    return get_score(winner_deck)
+
+def part2(decks: list[Deck]) -> int:
+    _, winner_deck = play_recursive_combat(decks)
+    return get_score(winner_deck)
+
 def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (None, None), skip_part1: bool = False) -> None:
     print(f'[{input_file}]')
     full_path = path.join(path.dirname(__file__), input_file)
@@ -82,9 +90,7 @@ def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (N
     # Part 1
     if not skip_part1:
         start_p1 = time.time_ns()
-        _, winner_deck = play_combat(decks)
-        print(winner_deck)
-        obtained_p1 = get_score(winner_deck)
+        obtained_p1 = part1(decks)
         time_p1 = (time.time_ns() - start_p1) + time_common
 
         print('Part 1 answer:', obtained_p1, '(took', time_p1, 'ns)')
@@ -93,9 +99,7 @@ def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (N
 
     # Part 2
     start_p2 = time.time_ns()
-    _, winner_deck_p2 = play_recursive_combat(decks)
-    print(winner_deck_p2)
-    obtained_p2 = get_score(winner_deck_p2)
+    obtained_p2 = part2(decks)
     time_p2 = (time.time_ns() - start_p2) + time_common
 
     print('Part 2 answer:', obtained_p2, '(took', time_p2, 'ns)')
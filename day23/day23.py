@@ -1,6 +1,11 @@
 from __future__ import annotations
+from array import array
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
 from functools import reduce
 from typing import Optional, cast
+import os
+import sys
 import time
 
 class Node:
@@ -56,7 +61,93 @@ class NodeRange:
     def size(self) -> int:
         return len(self.value_range)
 
-def play(labeling: list[int], n_moves: int) -> list[int]:
+def count_segments(node: NodeRange) -> int:
+    segments = 1
+    curr_node = node.next
+    while curr_node is not node and curr_node is not None:
+        segments += 1
+        curr_node = curr_node.next
+    return segments
+
+def get_rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        pass
+
+    # not on Linux, fall back to the peak RSS (in KB on Linux, bytes on macOS), or 0 where it's not available (Windows)
+    try:
+        import resource
+    except ImportError:
+        return 0
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+@dataclass
+class ProgressSample:
+    moves_done: int
+    moves_total: int
+    moves_per_sec: float # since the previous sample
+    rss_bytes: int
+    segments: Optional[int] = None # number of `NodeRange`s in the circle, for the engines that use them
+
+ProgressCallback = Callable[[ProgressSample], None]
+
+class ProgressTracker:
+    '''
+    Splits a game into chunks of `stride` moves and reports a sample to `callback` after each one.
+    The engines only check for progress between chunks, so without a callback the whole game is a
+    single chunk and the move loop runs untouched.
+    '''
+
+    def __init__(self, n_moves: int, callback: Optional[ProgressCallback], stride: int):
+        self.n_moves = n_moves
+        self.callback = callback
+        self.stride = max(stride, 1)
+        self.last_t = time.perf_counter_ns()
+        self.last_moves_left = n_moves
+
+    def chunk_ends(self) -> Iterator[int]:
+        '''
+        Yields the number of moves left at the end of each chunk.
+        '''
+        if self.callback is not None:
+            yield from range(self.n_moves - self.stride, 0, -self.stride)
+        yield 0
+
+    def report(self, moves_left: int, segments: Optional[Callable[[], int]] = None) -> None:
+        if self.callback is None:
+            return
+
+        now_t = time.perf_counter_ns()
+        elapsed_s = max(now_t - self.last_t, 1) / 1e9
+        moves_per_sec = (self.last_moves_left - moves_left) / elapsed_s
+        self.last_t = now_t
+        self.last_moves_left = moves_left
+
+        self.callback(ProgressSample(
+            moves_done = self.n_moves - moves_left,
+            moves_total = self.n_moves,
+            moves_per_sec = moves_per_sec,
+            rss_bytes = get_rss_bytes(),
+            segments = segments() if segments is not None else None))
+
+def print_progress(sample: ProgressSample) -> None:
+    segments_str = f', {sample.segments} segments' if sample.segments is not None else ''
+    print(f'Moves: {sample.moves_done}/{sample.moves_total} ({sample.moves_per_sec:.0f} moves/s, RSS {sample.rss_bytes // 2**20} MB{segments_str})')
+
+def play(labeling: list[int], n_moves: int, *, progress: Optional[ProgressCallback] = None, progress_stride: int = 100000) -> list[int]:
+    if progress is not None:
+        # the current cup is always first, so the game can be played in chunks between reports
+        tracker = ProgressTracker(n_moves, progress, progress_stride)
+        for chunk_end in tracker.chunk_ends():
+            labeling = play(labeling, n_moves - chunk_end)
+            n_moves = chunk_end
+            tracker.report(n_moves)
+        return labeling
+
     if n_moves == 0:
         return labeling
 
@@ -87,27 +178,31 @@ def labeling_to_str(labeling: list[int], pivot = 1) -> str:
 ..., 999998, 9, 15, (20), ..., 999997, 999999, 1000000, 8, 11, 12, 13, 1, 3, 4, 6, 7, 2, 5, 10, 14, 16, 17, 19, 18, 22, ...
 '''
 
-def play_v2(labeling_start: list[int], n_moves: int) -> list[int]:
+def play_v2(labeling_start: list[int], n_moves: int, *, progress: Optional[ProgressCallback] = None, progress_stride: int = 100000) -> list[int]:
     max_value = 1000000
     labeling = labeling_start + list(range(max(labeling_start) + 1, max_value + 1))
-    while n_moves > 0:
-        curr, *rest = labeling
-        picked = rest[0:3]
-        dest = curr - 1
-        while dest in picked:
-            dest -= 1
-
-        if dest < 1:
-            dest = max_value
-
-        # print('Move:', n_moves, 'Curr:', curr, 'Picked:', picked, 'Dest:', dest)
-        dest_idx = rest.index(dest)
-        labeling = rest[3:(dest_idx + 1)] + picked + rest[(dest_idx + 1):] + [curr]
-        n_moves -= 1
+    tracker = ProgressTracker(n_moves, progress, progress_stride)
+    for chunk_end in tracker.chunk_ends():
+        while n_moves > chunk_end:
+            curr, *rest = labeling
+            picked = rest[0:3]
+            dest = curr - 1
+            while dest in picked:
+                dest -= 1
+
+            if dest < 1:
+                dest = max_value
+
+            # print('Move:', n_moves, 'Curr:', curr, 'Picked:', picked, 'Dest:', dest)
+            dest_idx = rest.index(dest)
+            labeling = rest[3:(dest_idx + 1)] + picked + rest[(dest_idx + 1):] + [curr]
+            n_moves -= 1
+
+        tracker.report(n_moves)
     
     return labeling
 
-def play_v3(labeling_start: list[int], n_moves: int) -> list[int]:
+def play_v3(labeling_start: list[int], n_moves: int, *, progress: Optional[ProgressCallback] = None, progress_stride: int = 100000) -> list[int]:
     max_value = 1000000
     labeling = labeling_start + list(range(max(labeling_start) + 1, max_value + 1))
     labeling_len = len(labeling)
@@ -122,42 +217,46 @@ def play_v3(labeling_start: list[int], n_moves: int) -> list[int]:
 
     curr_idx = 0
     max_value_idx = labeling_len - 1
-    while n_moves > 0:
-        curr = labeling[curr_idx]
-        picked = [get_num_at(curr_idx + i + 1) for i in range(3)]
-        dest = curr - 1
-
-        while dest in picked:
-            dest -= 1
-
-        if dest < 1:
-            dest = max_value
-            # assert labeling[-1] == max_value
-
-        dest_idx = labeling.index(dest)
-        if abs(dest_idx - curr_idx) > labeling_len / 2:
-            shift_idx = curr_idx
-            while shift_idx != dest_idx:
-                set_num_at(shift_idx + 3, get_num_at(shift_idx))
-                shift_idx = (shift_idx - 1) % labeling_len
-
-            shift_idx += 1
-            curr_idx += 3
-        else:
-            shift_idx = curr_idx + 1
-            while get_num_at(shift_idx - 1) != dest:
-                set_num_at(shift_idx, get_num_at(shift_idx + 3))
+    tracker = ProgressTracker(n_moves, progress, progress_stride)
+    for chunk_end in tracker.chunk_ends():
+        while n_moves > chunk_end:
+            curr = labeling[curr_idx]
+            picked = [get_num_at(curr_idx + i + 1) for i in range(3)]
+            dest = curr - 1
+
+            while dest in picked:
+                dest -= 1
+
+            if dest < 1:
+                dest = max_value
+                # assert labeling[-1] == max_value
+
+            dest_idx = labeling.index(dest)
+            if abs(dest_idx - curr_idx) > labeling_len / 2:
+                shift_idx = curr_idx
+                while shift_idx != dest_idx:
+                    set_num_at(shift_idx + 3, get_num_at(shift_idx))
+                    shift_idx = (shift_idx - 1) % labeling_len
+
                 shift_idx += 1
+                curr_idx += 3
+            else:
+                shift_idx = curr_idx + 1
+                while get_num_at(shift_idx - 1) != dest:
+                    set_num_at(shift_idx, get_num_at(shift_idx + 3))
+                    shift_idx += 1
+
+            for i in range(3):
+                set_num_at(shift_idx + i, picked[i])
 
-        for i in range(3):
-            set_num_at(shift_idx + i, picked[i])
+            curr_idx = (curr_idx + 1) % len(labeling)
+            n_moves -= 1
 
-        curr_idx = (curr_idx + 1) % len(labeling)
-        n_moves -= 1
+        tracker.report(n_moves)
     
     return labeling
 
-def play_v4(labeling_start: list[int], n_moves: int) -> list[int]:
+def play_v4(labeling_start: list[int], n_moves: int, *, progress: Optional[ProgressCallback] = None, progress_stride: int = 100000) -> list[int]:
     max_value = 1000000
 
     # Build list
@@ -170,38 +269,42 @@ def play_v4(labeling_start: list[int], n_moves: int) -> list[int]:
     last.link(cast(Node, head))
 
     curr_node = head
-    while n_moves > 0:
-        curr = curr_node.value
+    tracker = ProgressTracker(n_moves, progress, progress_stride)
+    for chunk_end in tracker.chunk_ends():
+        while n_moves > chunk_end:
+            curr = curr_node.value
         
-        # Get the picked items head and last nodes
-        picked_head = curr_node.next
-        picked_last = picked_head.next.next
-        picked = [picked_head.value, picked_head.next.value, picked_last.value]
+            # Get the picked items head and last nodes
+            picked_head = curr_node.next
+            picked_last = picked_head.next.next
+            picked = [picked_head.value, picked_head.next.value, picked_last.value]
 
-        # Find the destination node
-        dest = curr - 1
-        while dest in picked:
-            dest -= 1
+            # Find the destination node
+            dest = curr - 1
+            while dest in picked:
+                dest -= 1
 
-        if dest < 1:
-            dest = max_value
+            if dest < 1:
+                dest = max_value
 
-        # print('Move:', n_moves, 'Curr:', curr, 'Picked:', picked, 'Dest:', dest)
-        dest_node = picked_last.next
-        while dest_node.value != dest:
-            dest_node = dest_node.next
+            # print('Move:', n_moves, 'Curr:', curr, 'Picked:', picked, 'Dest:', dest)
+            dest_node = picked_last.next
+            while dest_node.value != dest:
+                dest_node = dest_node.next
 
-        # Move the picked sub-list to after the dest node
-        after_dest_node = dest_node.next
-        after_picked_nodes = picked_last.next
+            # Move the picked sub-list to after the dest node
+            after_dest_node = dest_node.next
+            after_picked_nodes = picked_last.next
 
-        dest_node.link(cast(Node, picked_head))
-        picked_last.link(cast(Node, after_dest_node))
-        curr_node.link(cast(Node, after_picked_nodes))
+            dest_node.link(cast(Node, picked_head))
+            picked_last.link(cast(Node, after_dest_node))
+            curr_node.link(cast(Node, after_picked_nodes))
 
-        # Advance the current
-        curr_node = curr_node.next
-        n_moves -= 1
+            # Advance the current
+            curr_node = curr_node.next
+            n_moves -= 1
+
+        tracker.report(n_moves)
     
     # Convert to list
     labeling = list[int]()
@@ -213,7 +316,7 @@ def play_v4(labeling_start: list[int], n_moves: int) -> list[int]:
 
     return labeling
 
-def play_v5(labeling_start: list[int], n_moves: int) -> list[int]:
+def play_v5(labeling_start: list[int], n_moves: int, *, progress: Optional[ProgressCallback] = None, progress_stride: int = 100000) -> list[int]:
     max_value = 1000000
 
     # Build list
@@ -225,71 +328,69 @@ def play_v5(labeling_start: list[int], n_moves: int) -> list[int]:
     # Make it circular
     last.link(cast(NodeRange, head))
 
-    start_t = time.time_ns()
+    tracker = ProgressTracker(n_moves, progress, progress_stride)
     curr_node = head
     curr_node_i = 0
-    while n_moves > 0:
-        if n_moves % 100000 == 0:
-            end_t = time.time_ns()
-            print('Missing moves:', n_moves, 'Ellapsed:', end_t - start_t, 'ns')
-            start_t = end_t
-
-        curr = curr_node.value_range.start + curr_node_i
+    for chunk_end in tracker.chunk_ends():
+        while n_moves > chunk_end:
+            curr = curr_node.value_range.start + curr_node_i
         
-        # Get the picked items head and last nodes
-        if curr_node.size() > 1:
-            picked_head = curr_node.split_at(curr + 1)
-            picked_last = picked_head
-            if picked_head.size() > 3:
-                picked_head.split_at(curr + 4)
-        else:
-            picked_head = curr_node.next
-            picked_last = picked_head
+            # Get the picked items head and last nodes
+            if curr_node.size() > 1:
+                picked_head = curr_node.split_at(curr + 1)
+                picked_last = picked_head
+                if picked_head.size() > 3:
+                    picked_head.split_at(curr + 4)
+            else:
+                picked_head = curr_node.next
+                picked_last = picked_head
             
-        missing_picks = 3 - picked_head.size()
-        while missing_picks > 0:
-            picked_last = picked_last.next
-            missing_picks -= picked_last.size()
-
-        if missing_picks < 0:
-            picked_last.split_at(picked_last.value_range.stop + missing_picks)
-
-        picked = list[int]()
-        curr_picked_node = picked_head
-        while curr_picked_node != picked_last.next:
-            picked.extend(curr_picked_node.value_range)
-            curr_picked_node = curr_picked_node.next
-
-        # Find the destination node
-        dest = curr - 1
-        while dest in picked:
-            dest -= 1
-
-        if dest < 1:
-            dest = max_value
-
-        # print('Move:', n_moves, 'Curr:', curr, 'Picked:', picked, 'Dest:', dest)
-        dest_node = picked_last.next
-        while dest not in dest_node.value_range:
-            dest_node = dest_node.next
-
-        # Move the picked sub-list to after the dest node
-        if dest_node.size() > 1:
-            dest_node.split_at(dest + 1)
+            missing_picks = 3 - picked_head.size()
+            while missing_picks > 0:
+                picked_last = picked_last.next
+                missing_picks -= picked_last.size()
+
+            if missing_picks < 0:
+                picked_last.split_at(picked_last.value_range.stop + missing_picks)
+
+            picked = list[int]()
+            curr_picked_node = picked_head
+            while curr_picked_node != picked_last.next:
+                picked.extend(curr_picked_node.value_range)
+                curr_picked_node = curr_picked_node.next
+
+            # Find the destination node
+            dest = curr - 1
+            while dest in picked:
+                dest -= 1
+
+            if dest < 1:
+                dest = max_value
+
+            # print('Move:', n_moves, 'Curr:', curr, 'Picked:', picked, 'Dest:', dest)
+            dest_node = picked_last.next
+            while dest not in dest_node.value_range:
+                dest_node = dest_node.next
+
+            # Move the picked sub-list to after the dest node
+            if dest_node.size() > 1:
+                dest_node.split_at(dest + 1)
             
-        after_dest_node = dest_node.next
-        after_picked_nodes = picked_last.next
+            after_dest_node = dest_node.next
+            after_picked_nodes = picked_last.next
 
-        dest_node.link(cast(NodeRange, picked_head), try_to_merge = True)
-        picked_last.link(cast(NodeRange, after_dest_node), try_to_merge = True)
-        curr_node.link(cast(NodeRange, after_picked_nodes), try_to_merge = True)
+            dest_node.link(cast(NodeRange, picked_head), try_to_merge = True)
+            picked_last.link(cast(NodeRange, after_dest_node), try_to_merge = True)
+            curr_node.link(cast(NodeRange, after_picked_nodes), try_to_merge = True)
 
-        # Advance the current
-        curr_node_i += 1
-        if curr_node_i == curr_node.size():
-            curr_node_i = 0
-            curr_node = curr_node.next
-        n_moves -= 1
+            # Advance the current
+            curr_node_i += 1
+            if curr_node_i == curr_node.size():
+                curr_node_i = 0
+                curr_node = curr_node.next
+            n_moves -= 1
+
+        tracker.report(n_moves, segments = lambda: count_segments(curr_node))
     
     # Convert to list
     labeling = list[int]()
@@ -302,7 +403,60 @@ def play_v5(labeling_start: list[int], n_moves: int) -> list[int]:
 
     return labeling
     
-def solve(labeling_str: str, *, expected: tuple[Optional[str], Optional[str]] = (None, None)) -> None:
+def play_v6(labeling_start: list[int], n_moves: int, max_value: int = 1000000, *, progress: Optional[ProgressCallback] = None, progress_stride: int = 100000) -> array:
+    '''
+    Keeps the circle as a successor table, `next_cup[label]` being the label of the cup after `label`,
+    so picking up, finding the destination and splicing are all O(1) per move.
+    Returns the table, which can be read with `cups_after`.
+    '''
+    max_start = max(labeling_start)
+    max_value = max(max_value, max_start)
+
+    # the cups above the starting labels follow each other in order, index 0 is unused
+    next_cup = array('I', range(1, max_value + 2))
+    labels_in_order = labeling_start + ([max_start + 1] if max_value > max_start else [])
+    for label, next_label in zip(labels_in_order, labels_in_order[1:]):
+        next_cup[label] = next_label
+    next_cup[max_value if max_value > max_start else labeling_start[-1]] = labeling_start[0]
+
+    tracker = ProgressTracker(n_moves, progress, progress_stride)
+    curr = labeling_start[0]
+    for chunk_end in tracker.chunk_ends():
+        for _ in range(n_moves - chunk_end):
+            picked_head = next_cup[curr]
+            picked_mid = next_cup[picked_head]
+            picked_last = next_cup[picked_mid]
+
+            dest = curr - 1 or max_value
+            while dest == picked_head or dest == picked_mid or dest == picked_last:
+                dest = dest - 1 or max_value
+
+            next_cup[curr] = next_cup[picked_last]
+            next_cup[picked_last] = next_cup[dest]
+            next_cup[dest] = picked_head
+            curr = next_cup[curr]
+
+        n_moves = chunk_end
+        tracker.report(n_moves)
+
+    return next_cup
+
+def cups_after(next_cup: array, label: int, count: int) -> list[int]:
+    cups = list[int]()
+    for _ in range(count):
+        label = next_cup[label]
+        cups.append(label)
+    return cups
+
+def part1(labeling: list[int]) -> str:
+    return labeling_to_str(play(labeling, n_moves = 100))
+
+def part2(labeling: list[int], *, progress: Optional[ProgressCallback] = None) -> int:
+    next_cup = play_v6(labeling, n_moves = 10000000, progress = progress, progress_stride = 1000000)
+    a, b = cups_after(next_cup, 1, 2)
+    return a * b
+
+def solve(labeling_str: str, *, expected: tuple[Optional[str], Optional[str]] = (None, None), progress: Optional[ProgressCallback] = None) -> None:
     print(f'[{labeling_str}]')
 
     # Common
@@ -312,8 +466,7 @@ def solve(labeling_str: str, *, expected: tuple[Optional[str], Optional[str]] =
 
     # Part 1
     start_p1 = time.time_ns()
-    new_labeling = play(labeling, n_moves = 100)
-    obtained_p1 = labeling_to_str(new_labeling)
+    obtained_p1 = part1(labeling)
     time_p1 = (time.time_ns() - start_p1) + time_common
 
     print('Part 1 answer:', obtained_p1, '(took', time_p1, 'ns)')
@@ -322,11 +475,7 @@ def solve(labeling_str: str, *, expected: tuple[Optional[str], Optional[str]] =
 
     # Part 2
     start_p2 = time.time_ns()
-    new_labeling_v2 = play_v5(labeling, n_moves = 10000000)
-    idx_of_1 = new_labeling_v2.index(1)
-    a, b = new_labeling_v2[(idx_of_1 + 1) % len(new_labeling_v2)], new_labeling_v2[(idx_of_1 + 2) % len(new_labeling_v2)]
-    print(a, b)
-    obtained_p2 = a * b
+    obtained_p2 = part2(labeling, progress = progress)
     time_p2 = (time.time_ns() - start_p2) + time_common
 
     print('Part 2 answer:', obtained_p2, '(took', time_p2, 'ns)')
@@ -336,5 +485,5 @@ def solve(labeling_str: str, *, expected: tuple[Optional[str], Optional[str]] =
     print()
 
 if __name__ == '__main__':
-    solve('389125467', expected = ('67384529', None))
+    solve('389125467', expected = ('67384529', 149245887792))
     solve('963275481', expected = (None, None))
\ No newline at end of file
@@ -76,6 +76,23 @@ def daily_flip_tiles(black_tiles: set[tuple[int, int, int]]):
 
     flip_tiles(black_tiles, tiles_to_flip)
 
+def flip_initial_tiles(tiles_to_flip: list[list[Direction]]) -> set[tuple[int, int, int]]:
+    black_tiles = set[tuple[int, int, int]]()
+    flip_tiles(black_tiles, [directions_to_coordinate(ds) for ds in tiles_to_flip])
+    return black_tiles
+
+def part1(tiles_to_flip: list[list[Direction]]) -> int:
+    return len(flip_initial_tiles(tiles_to_flip))
+
+def part2(black_tiles: set[tuple[int, int, int]]) -> int:
+    '''
+    Flips `black_tiles` in place for 100 days, starting from the tiles flipped in part 1.
+    '''
+    for _ in range(100):
+        daily_flip_tiles(black_tiles)
+
+    return len(black_tiles)
+
 def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (None, None)) -> None:
     print(f'[{input_file}]')
     full_path = path.join(path.dirname(__file__), input_file)
@@ -87,8 +104,7 @@ def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (N
 
     # Part 1
     start_p1 = time.time_ns()
-    black_tiles = set[tuple[int, int, int]]()
-    flip_tiles(black_tiles, [directions_to_coordinate(ds) for ds in tiles_to_flip])
+    black_tiles = flip_initial_tiles(tiles_to_flip)
     obtained_p1 = len(black_tiles)
     time_p1 = (time.time_ns() - start_p1) + time_common
 
@@ -98,10 +114,7 @@ def solve(input_file: str, *, expected: tuple[Optional[int], Optional[int]] = (N
 
     # Part 2
     start_p2 = time.time_ns()
-    for _ in range(100):
-        daily_flip_tiles(black_tiles)
-
-    obtained_p2 = len(black_tiles)
+    obtained_p2 = part2(black_tiles)
     time_p2 = (time.time_ns() - start_p2) + time_common
 
     print('Part 2 answer:', obtained_p2, '(took', time_p2, 'ns)')
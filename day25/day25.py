@@ -20,14 +20,16 @@ def find_loop_size(subject_nr: int, public_key: int) -> int:
 
     return loop_size
 
+def part1(subject_nr: int, public_keys: tuple[int, int]) -> int:
+    # one loop size is enough to derive the encryption key from the other public key
+    return transform(public_keys[0], find_loop_size(subject_nr, public_keys[1]))
+
 def solve(*, subject_nr: int, public_keys: tuple[int, int], expected: Optional[int] = None) -> None:
     print(f'[Subject={subject_nr}, Public Keys={public_keys}]')
 
     # Part 1
     start_p1 = time.time_ns()
-    loop_sizes = tuple([find_loop_size(subject_nr, key) for key in public_keys])
-    print(loop_sizes)
-    obtained_p1 = transform(public_keys[0], loop_sizes[1])
+    obtained_p1 = part1(subject_nr, public_keys)
     time_p1 = time.time_ns() - start_p1
 
     print('Part 1 answer:', obtained_p1, '(took', time_p1, 'ns)')
@@ -0,0 +1,267 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from glob import glob
+from os import path
+from typing import Optional
+import argparse
+import ast
+import importlib
+import io
+import os
+import re
+import sys
+import time
+
+from cache import ResultCache, find_input_files, hash_files, hash_module_source
+
+ROOT_DIR = path.dirname(path.abspath(__file__))
+DAY_DIR_REGEX = re.compile(r'day(\d+)')
+ANSWER_REGEX = re.compile(r'Part (\d) answer: (.*?)(?: \(took \d+ ns\))?$')
+# the solvers print the input they're about to solve between brackets, e.g. `[example.txt] v2` or `[0, 3, 6]`
+SECTION_REGEX = re.compile(r'\[.*\].*')
+# bumped whenever `JobResult` changes, so that results cached by older versions are not reused
+CACHE_FORMAT = b'2'
+# labels longer than this are cut, as some jobs pass their whole input as a literal
+MAX_LABEL_LENGTH = 48
+
+# the answers printed for one input: the section header and the answer of each part
+Section = tuple[str, dict[int, str]]
+
+@dataclass(frozen = True)
+class Job:
+    day: int
+    module_name: str
+    source: str # the statement(s) from the module's __main__ block to execute
+
+    @property
+    def label(self) -> str:
+        first_line, *rest = self.source.splitlines()
+        if len(first_line) > MAX_LABEL_LENGTH:
+            return first_line[:MAX_LABEL_LENGTH - 3] + '...'
+        return first_line + (' ...' if rest else '')
+
+@dataclass
+class JobResult:
+    job: Job
+    sections: list[Section]
+    wall_ns: int
+    cpu_ns: int
+    status: str
+    output: str
+    cached: bool = False
+
+def find_day_modules(days: Optional[set[int]] = None) -> list[tuple[int, str]]:
+    modules = list[tuple[int, str]]()
+    for day_dir in sorted(glob(path.join(ROOT_DIR, 'day*'))):
+        day_match = DAY_DIR_REGEX.fullmatch(path.basename(day_dir))
+        if day_match is None:
+            continue
+
+        day = int(day_match.group(1))
+        module_file = path.join(day_dir, f'day{day}.py')
+        if path.isfile(module_file) and (days is None or day in days):
+            modules.append((day, f'{path.basename(day_dir)}.day{day}'))
+
+    return modules
+
+def is_main_guard(node: ast.stmt) -> bool:
+    return (
+        isinstance(node, ast.If)
+        and isinstance(node.test, ast.Compare)
+        and isinstance(node.test.left, ast.Name)
+        and node.test.left.id == '__name__'
+        and len(node.test.comparators) == 1
+        and isinstance(node.test.comparators[0], ast.Constant)
+        and node.test.comparators[0].value == '__main__')
+
+def is_call_stmt(node: ast.stmt) -> bool:
+    '''
+    Whether the statement only calls functions, directly or in a loop, so it doesn't bind names
+    that later statements could depend on.
+    '''
+    if isinstance(node, ast.Expr):
+        return isinstance(node.value, ast.Call)
+    elif isinstance(node, ast.For):
+        return not node.orelse and all(is_call_stmt(stmt) for stmt in node.body)
+    else:
+        return False
+
+def find_jobs(day: int, module_name: str) -> list[Job]:
+    '''
+    Extracts the jobs of a day from its `__main__` block. When the block is only made of calls (e.g. `solve(...)`,
+    `solve_v2(...)` or a loop of them), each statement becomes an independent job, otherwise the whole block
+    runs as a single job.
+    '''
+    module_file = path.join(ROOT_DIR, *module_name.split('.')) + '.py'
+    with open(module_file) as f:
+        module_ast = ast.parse(f.read(), module_file)
+
+    main_block = next((node for node in module_ast.body if is_main_guard(node)), None)
+    if not isinstance(main_block, ast.If):
+        return []
+
+    stmts = main_block.body
+    if all(is_call_stmt(stmt) for stmt in stmts):
+        return [Job(day, module_name, ast.unparse(stmt)) for stmt in stmts]
+    else:
+        return [Job(day, module_name, '\n'.join(ast.unparse(stmt) for stmt in stmts))]
+
+def init_worker() -> None:
+    # days import each other as `dayNN.dayN`, so the repo root must be importable
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+
+def cpu_time_ns() -> int:
+    '''
+    CPU time of this process and of its children that were waited for, so that solvers running their own
+    process pools (e.g. day 15) are accounted for too.
+    '''
+    times = os.times()
+    return time.process_time_ns() + int((times.children_user + times.children_system) * 1e9)
+
+def run_job(job: Job) -> JobResult:
+    init_worker()
+    output = io.StringIO()
+    start_wall = time.perf_counter_ns()
+    start_cpu = cpu_time_ns()
+    try:
+        module = importlib.import_module(job.module_name)
+        with redirect_stdout(output):
+            exec(compile(job.source, module.__file__ or job.module_name, 'exec'), vars(module))
+        status = 'ok'
+    except Exception as e:
+        status = f'{e.__class__.__name__}: {e}'
+
+    wall_ns = time.perf_counter_ns() - start_wall
+    cpu_ns = cpu_time_ns() - start_cpu
+    output_str = output.getvalue()
+    if status == 'ok' and 'Expected:' in output_str:
+        status = 'mismatch'
+
+    return JobResult(job, parse_sections(output_str), wall_ns, cpu_ns, status, output_str)
+
+def parse_sections(output: str) -> list[Section]:
+    '''
+    Splits the answers by the input they were printed for, so that jobs solving several inputs (e.g. in a loop)
+    report each of them instead of only the last one.
+    '''
+    sections = [('', dict[int, str]())]
+    for line in output.splitlines():
+        if SECTION_REGEX.fullmatch(line):
+            sections.append((line, dict[int, str]()))
+            continue
+
+        answer_match = ANSWER_REGEX.match(line)
+        if answer_match:
+            sections[-1][1][int(answer_match.group(1))] = answer_match.group(2)
+
+    return [section for section in sections if section[1]] or [('', {})]
+
+def job_cache_key(cache: ResultCache, job: Job) -> str:
+    '''
+    Jobs are keyed by their source, the source of the day module and the bytes of the input files they name.
+    When the file names are built at runtime (f-strings), all the text files of the day are hashed instead.
+    '''
+    init_worker()
+    module = importlib.import_module(job.module_name)
+    job_nodes = list(ast.walk(ast.parse(job.source)))
+    if any(isinstance(node, ast.JoinedStr) for node in job_nodes):
+        input_files = glob(path.join(path.dirname(module.__file__ or ''), '*.txt'))
+    else:
+        input_files = find_input_files(module, [node.value for node in job_nodes if isinstance(node, ast.Constant)])
+
+    return cache.make_key(CACHE_FORMAT, job.source.encode(), hash_module_source(module), hash_files(input_files))
+
+def run_jobs(jobs: list[Job], max_workers: Optional[int] = None, cache: Optional[ResultCache] = None) -> list[JobResult]:
+    results = list[JobResult]()
+    pending_jobs = dict[Job, str]()
+    for job in jobs:
+        key = job_cache_key(cache, job) if cache is not None else ''
+        cached_result = cache.get(key) if cache is not None else None
+        if isinstance(cached_result, JobResult):
+            cached_result.cached = True
+            results.append(cached_result)
+        else:
+            pending_jobs[job] = key
+
+    def store(result: JobResult) -> None:
+        # failures are usually environmental (e.g. a missing input), so they are always retried
+        if cache is not None and result.status in ('ok', 'mismatch'):
+            cache.put(pending_jobs[result.job], result)
+        results.append(result)
+
+    if max_workers == 1:
+        for job in pending_jobs:
+            store(run_job(job))
+    elif pending_jobs:
+        with ProcessPoolExecutor(max_workers = max_workers or os.cpu_count(), initializer = init_worker) as executor:
+            futures = [executor.submit(run_job, job) for job in pending_jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                print(f'  day {result.job.day:2}: {result.job.label} [{result.status}]', file = sys.stderr)
+                store(result)
+
+    order = { job: idx for idx, job in enumerate(jobs) }
+    return sorted(results, key = lambda r: order[r.job])
+
+def format_ns(ns: int) -> str:
+    if ns >= 1_000_000_000:
+        return f'{ns / 1_000_000_000:.2f} s'
+    else:
+        return f'{ns / 1_000_000:.1f} ms'
+
+def format_table(results: list[JobResult], total_wall_ns: int) -> str:
+    header = ('Day', 'Job', 'Part 1', 'Part 2', 'Wall', 'CPU', 'Status')
+    rows = list[tuple[str, ...]]()
+    for r in results:
+        for idx, (section, answers) in enumerate(r.sections):
+            # jobs that solved several inputs get a row per input, with the job, timings and status on the first one
+            if len(r.sections) == 1:
+                label = r.job.label
+            else:
+                label = f'{r.job.label} {section}' if idx == 0 else f'  {section}'
+            timings = (format_ns(r.wall_ns), format_ns(r.cpu_ns), r.status + (' (cached)' if r.cached else '')) if idx == 0 else ('', '', '')
+            rows.append((str(r.job.day) if idx == 0 else '', label, answers.get(1, '-'), answers.get(2, '-'), *timings))
+    rows.append(('', 'Total', '', '', format_ns(total_wall_ns), format_ns(sum(r.cpu_ns for r in results)), ''))
+
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    lines = [' | '.join(cell.ljust(w) for cell, w in zip(row, widths)).rstrip() for row in [header] + rows]
+    lines.insert(1, '-+-'.join('-' * w for w in widths))
+    return '\n'.join(lines)
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description = 'Run the solutions of several days in parallel.')
+    parser.add_argument('days', nargs = '*', type = int, help = 'days to run (default: all)')
+    parser.add_argument('-j', '--jobs', type = int, default = None, help = 'number of worker processes (default: number of cores)')
+    parser.add_argument('-v', '--verbose', action = 'store_true', help = 'print the full output of each job')
+    parser.add_argument('--no-cache', action = 'store_true', help = 'rerun every job, even if its cached result is still valid')
+    parser.add_argument('--clear-cache', action = 'store_true', help = 'remove all the cached results before running')
+    args = parser.parse_args(argv)
+
+    jobs = [
+        job
+        for day, module_name
+        in find_day_modules(set(args.days) or None)
+        for job
+        in find_jobs(day, module_name)
+    ]
+
+    cache = ResultCache()
+    if args.clear_cache:
+        cache.clear()
+
+    start = time.perf_counter_ns()
+    results = run_jobs(jobs, args.jobs, None if args.no_cache else cache)
+    total_wall_ns = time.perf_counter_ns() - start
+
+    if args.verbose:
+        for r in results:
+            print(f'== day {r.job.day}: {r.job.label}')
+            print(r.output)
+
+    print(format_table(results, total_wall_ns))
+
+if __name__ == '__main__':
+    main()